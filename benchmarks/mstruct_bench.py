@@ -0,0 +1,40 @@
+"""
+Micro-benchmark of mstruct: construction, attribute set/get, dict2struct, copy and pickling.
+
+    python benchmarks/mstruct_bench.py
+"""
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tools.utils.utils import mstruct, dict2struct
+
+
+def _fields(k):
+    return {f'field_{i}': i for i in range(k)}
+
+
+def run(number=10000):
+    for k in [5, 20, 100]:
+        d = _fields(k)
+        s = dict2struct(d)
+        cases = {
+            'mstruct(**d)': lambda: mstruct(**d),
+            'dict2struct(d)': lambda: dict2struct(d),
+            'setattr': lambda: setattr(s, 'field_0', 1),
+            'getattr': lambda: s.field_0,
+            'to_dict': lambda: s.to_dict(),
+            'copy': lambda: s.copy(),
+            'pickle': lambda: pickle.loads(pickle.dumps(s)),
+        }
+        for name, f in cases.items():
+            t = timeit.timeit(f, number=number)
+            print(f'k={k:<4d} {name:<16s} {1e6 * t / number:10.2f} us')
+        print()
+
+
+if __name__ == '__main__':
+    run()
@@ -1,7 +1,6 @@
 import pandas as pd
 import numpy as np
 
-from ira.series.Indicators import ATR, MovingMinMax
 from ira.simulator.SignalTester import Tracker
 
 import qlearn as q
@@ -14,13 +13,17 @@ from tools.utils.utils import mstruct
 
 @q.signal_generator
 class Lustre(BaseEstimator):
-    def __init__(self, timeframe, atr_period, mx, price_moving_period, vol_moving_period, tz='UTC'):
+    def __init__(self, timeframe, atr_period, mx, price_moving_period, vol_moving_period, tz='UTC',
+                 price_smoother='ema', vol_smoother='wma', atr_smoother='sma'):
         self.timeframe = timeframe
         self.atr_period = atr_period
         self.mx = mx
         self.price_moving_period = price_moving_period
         self.vol_moving_period = vol_moving_period
         self.tz = tz
+        self.price_smoother = price_smoother
+        self.vol_smoother = vol_smoother
+        self.atr_smoother = atr_smoother
         
     def fit(self, x, y, **kwargs):
         return self
@@ -31,9 +34,10 @@ class Lustre(BaseEstimator):
         # here we will use closes and volumes
         c, v = xr.close, xr.volume
 
-        cs = smooth(c, 'ema', self.price_moving_period)
-        vs = smooth(v, 'wma', self.vol_moving_period)
-        a = atr(xr, self.atr_period, smoother='sma').shift(1)
+        # smoothers are taken from registry (see tools.analysis.timeseries.register_smoother)
+        cs = smooth(c, self.price_smoother, self.price_moving_period)
+        vs = smooth(v, self.vol_smoother, self.vol_moving_period)
+        a = atr(xr, self.atr_period, smoother=self.atr_smoother).shift(1)
         
         dc = c.diff()
         li = c[(dc > +a * self.mx) & (c > cs) & (v >= vs)].index  
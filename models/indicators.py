@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from tools.analysis.timeseries import atr
-from tools.analysis.tools import srows, scols
+from tools.analysis.tools import srows, scols, njit
 from tools.utils.utils import mstruct
 
 
@@ -44,4 +44,56 @@ def rad_indicator(x, period, mult, smoother='sma'):
             
     rs = pd.Series(rs) 
     
-    return mstruct(rad=rs, long=rad_long, short=rad_short, U=radU, D=radD)
\ No newline at end of file
+    return mstruct(rad=rs, long=rad_long, short=rad_short, U=radU, D=radD)
+
+
+@njit
+def _rad_levels(close, l_stop, s_stop):
+    n = len(close)
+    side = np.zeros(n)
+    level = np.full(n, np.nan)
+    sd, lv = 0, np.nan
+    for k in range(2, n):
+        # levels for bar k are calculated when it's just started from completed bars k-1 and k-2
+        s2, l2, s1, l1 = s_stop[k - 2], l_stop[k - 2], s_stop[k - 1], l_stop[k - 1]
+        if np.isfinite(s2) and np.isfinite(l2):
+            c1, c2 = close[k - 1], close[k - 2]
+            if c2 > l2 and c1 < l1:
+                sd, lv = -1, s1
+
+            if c2 < s2 and c1 > s1:
+                sd, lv = +1, l1
+
+            if sd > 0 and l1 > lv:
+                lv = l1
+
+            if sd < 0 and s1 < lv:
+                lv = s1
+
+        side[k] = sd
+        level[k] = lv
+    return side, level
+
+
+def rad_levels(x, period, mult, smoother='sma'):
+    """
+    RAD chandelier side and stop level for every bar (as RADChandelier tracker updates them on new bar).
+    Values at bar's time are calculated from previous completed bars so they are valid for all quotes within this bar.
+
+    :param x: ohlc series
+    :param period: ATR and min/max period
+    :param mult: ATR multiplier
+    :param smoother: ATR smoother
+    :return: frame with Side (+1 up trend, -1 down trend, 0 not defined yet), Level columns and
+             ShortStop, LongStop columns (stops calculated on previous completed bar)
+    """
+    a = atr(x, period, smoother=smoother).values
+    hh = x.high.rolling(window=period).max().values
+    ll = x.low.rolling(window=period).min().values
+
+    l_stop, s_stop = hh - mult * a, ll + mult * a
+    side, level = _rad_levels(x.close.values.astype(np.float64), l_stop, s_stop)
+    return pd.DataFrame({
+        'Side': side, 'Level': level,
+        'ShortStop': np.concatenate(([np.nan], s_stop[:-1])), 'LongStop': np.concatenate(([np.nan], l_stop[:-1])),
+    }, index=x.index)
@@ -18,6 +18,7 @@ else:
     
 from tools.charting.plot_helpers import *
 from tools.analysis.timeseries import *
+from tools.analysis.pipeline import Pipeline
 from tools.analysis.data import make_forward_returns_matrix, permutate_params, retain_columns_and_join
 from tools.analysis.tools import (
     scols, srows, drop_duplicated_indexes, apply_to_frame, ohlc_resample, roll
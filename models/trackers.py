@@ -1,11 +1,25 @@
 import pandas as pd
 import numpy as np
-from ira.series.Indicators import ATR, MovingMinMax
 from ira.simulator.SignalTester import Tracker
 from qlearn.tracking.trackers import ATRTracker, TakeStopTracker
 from tools.analysis.timeseries import atr
+from tools.analysis.streaming import ATR, RollingMinMax
 from tools.analysis.tools import srows, scols
 from tools.utils.utils import mstruct
+from models.indicators import rad_levels
+
+
+def _bars_closed_since(ohlc, last_time) -> list:
+    """
+    Completed bars of ohlc series which are after last_time (in chronological order)
+    """
+    bars = []
+    for n in range(1, len(ohlc)):
+        b = ohlc[n]
+        if b is None or (last_time is not None and b.time <= last_time):
+            break
+        bars.append(b)
+    return bars[::-1]
 
 
 class Pyramiding(TakeStopTracker):
@@ -39,91 +53,117 @@ class Pyramiding(TakeStopTracker):
         self.atr_timeframe = atr_timeframe 
         self.atr_smoother = atr_smoother
         self.log10_round_size = int(np.log10(max(round_size, 1)))
+        self._is_debug = debug
         
     def initialize(self):
         self.n_entry = 0
         self.next_level = np.nan
+
+        # sizes schedule for all possible steps
+        self._step_sizes = [self._calc_position_size(n) for n in range(self.max_positions + 1)]
         
         # indicators stuff
         self.ohlc = self.get_ohlc_series(self.atr_timeframe)
         self.atr = ATR(self.atr_period, self.atr_smoother)
-        self.ohlc.attach(self.atr)
+        self._last_bar_time = None
 
-    def get_position_size_for_step(self, n):
+    def _update_indicators(self):
+        # streaming indicators are updated by every bar completed since last update
+        for b in _bars_closed_since(self.ohlc, self._last_bar_time):
+            self.atr.update(b.high, b.low, b.close)
+            self._last_bar_time = b.time
+
+    def _calc_position_size(self, n):
         n = n - self.pyramiding_start_step + 2
-        return np.round(self.size * (self.pyramiding_factor)**n, self.log10_round_size)
+        return float(np.round(self.size * (self.pyramiding_factor)**n, self.log10_round_size))
+
+    def get_position_size_for_step(self, n):
+        if 0 <= n < len(self._step_sizes):
+            return self._step_sizes[n]
+        return self._calc_position_size(n)
 
     def on_quote(self, quote_time, bid, ask, bid_size, ask_size, **kwargs):
-        tr = self.atr[1]
+        if self.ohlc.is_new_bar:
+            self._update_indicators()
         qty = self._position.quantity
 
-        if qty != 0 and tr is not None and np.isfinite(tr):
-            # --- long position processing
-            if qty > 0:
-                px = ask
-                D = +1
-
-            # --- long position processing
-            if qty < 0:
-                px = bid
-                D = -1
-                 
-            # price hits target's level
-            if (px - self.next_level) * D >= 0:
-                # we've aleady reached this level so next will be recomputed
-                mesg = f"[{quote_time}] {self._instrument} {px:.3f} touched {self.next_level:.3f} "
-                self.next_level = np.nan
+        # price hits target's level (comparison with nan level is always false)
+        if qty > 0:
+            if ask >= self.next_level:
+                self._on_level_touched(quote_time, qty, ask, +1)
+        elif qty < 0:
+            if bid <= self.next_level:
+                self._on_level_touched(quote_time, qty, bid, -1)
+
+        super().on_quote(quote_time, bid, ask, bid_size, ask_size, **kwargs)
+
+    def _on_level_touched(self, quote_time, qty, px, D):
+        tr = self.atr.value
+        if not np.isfinite(tr):
+            return
+
+        dbg = self._is_debug
+        if dbg:
+            mesg = f"[{quote_time}] {self._instrument} {px:.3f} touched {self.next_level:.3f} "
+
+        # we've aleady reached this level so next will be recomputed
+        self.next_level = np.nan
+        
+        # if we can increase
+        if self.n_entry + 1 <= self.max_positions:
+            inc_size = self.get_position_size_for_step(self.n_entry + 1)
+            if inc_size > 0:
+                self.n_entry += 1
+                self.next_level = px + D * self.next_mx * tr 
                 
-                # if we can increase
-                if self.n_entry + 1 <= self.max_positions:
-                    inc_size = self.get_position_size_for_step(self.n_entry + 1)
-                    if inc_size > 0:
-                        self.n_entry += 1
-                        self.next_level = px + D * self.next_mx * tr 
-                        
-                        if self.n_entry >= self.pyramiding_start_step:
-                            mesg += f'step ({self.n_entry}) -> {D*inc_size:+.0f} at ${px:.3f} next: {self.next_level:.3f}'
-
-                            # increase position
-                            self.trade(quote_time, qty + D * inc_size, mesg)
-
-                            # average position price
-                            avg_price = self._position.cost_usd / self._position.quantity
-
-                            # set new stop
-                            n_stop = avg_price - D * self.stop_mx * tr
-                        else:
-                            # set stop to breakeven only (not increase position !)
-                            mesg += f'step ({self.n_entry}) at ${px:.3f} move stop to breakeven next: {self.next_level:.3f}'
-                            # average position price
-                            avg_price = self._position.cost_usd / self._position.quantity
-                            n_stop = avg_price
-                        
-                        mesg += f", stop: {n_stop:.3f}, avg_price: {avg_price:.3f}"
-                        self.stop_at(quote_time, n_stop)
-                    else:
-                        if self.flat_on_max_step:
-                            mesg += "closing position because max possible step is reached and flat_on_max_step"
-                            self.trade(quote_time, 0, "Take profit")
-                        else:
-                            mesg += "position increasing size is zero: skip this step"
-                else:
+                if self.n_entry >= self.pyramiding_start_step:
+                    if dbg:
+                        mesg += f'step ({self.n_entry}) -> {D*inc_size:+.0f} at ${px:.3f} next: {self.next_level:.3f}'
+
                     # increase position
-                    if self.flat_on_max_step:
-                        mesg += "closing position because max step is and flat_on_max_step"
-                        self.trade(quote_time, 0, "Take profit")
-                    else:
-                        mesg += f'skip increasing atep: max number of entries ({self.max_positions}) '
-                        
-                self.debug(mesg)
+                    self.trade(quote_time, qty + D * inc_size, mesg if dbg else f'step ({self.n_entry})')
 
-        super().on_quote(quote_time, bid, ask, bid_size, ask_size, **kwargs)
+                    # average position price
+                    avg_price = self._position.cost_usd / self._position.quantity
+
+                    # set new stop
+                    n_stop = avg_price - D * self.stop_mx * tr
+                else:
+                    # set stop to breakeven only (not increase position !)
+                    if dbg:
+                        mesg += f'step ({self.n_entry}) at ${px:.3f} move stop to breakeven next: {self.next_level:.3f}'
+                    # average position price
+                    avg_price = self._position.cost_usd / self._position.quantity
+                    n_stop = avg_price
+                
+                if dbg:
+                    mesg += f", stop: {n_stop:.3f}, avg_price: {avg_price:.3f}"
+                self.stop_at(quote_time, n_stop)
+            else:
+                if self.flat_on_max_step:
+                    if dbg:
+                        mesg += "closing position because max possible step is reached and flat_on_max_step"
+                    self.trade(quote_time, 0, "Take profit")
+                elif dbg:
+                    mesg += "position increasing size is zero: skip this step"
+        else:
+            # increase position
+            if self.flat_on_max_step:
+                if dbg:
+                    mesg += "closing position because max step is and flat_on_max_step"
+                self.trade(quote_time, 0, "Take profit")
+            elif dbg:
+                mesg += f'skip increasing atep: max number of entries ({self.max_positions}) '
+                
+        if dbg:
+            self.debug(mesg)
         
     def on_signal(self, signal_time, signal_qty, quote_time, bid, ask, bid_size, ask_size):
-        tr = self.atr[1]
+        self._update_indicators()
+        tr = self.atr.value
 
         # we skip all signals if position is not flat or indicators not ready
-        if self._position.quantity != 0 or tr is None or not np.isfinite(tr):
+        if self._position.quantity != 0 or not np.isfinite(tr):
             return None
 
         pos = None
@@ -133,18 +173,20 @@ class Pyramiding(TakeStopTracker):
             self.n_entry = 1
             self.stop_at(signal_time, ask - self.stop_mx * tr)
             self.next_level = ask + self.next_mx * tr 
-            self.debug(
-                f'[{quote_time}] {self._instrument} step ({self.n_entry}) -> {pos} at ${ask:.3f} stop: {ask - self.stop_mx * tr:.3f}, next: {self.next_level:.3f}'
-            )
+            if self._is_debug:
+                self.debug(
+                    f'[{quote_time}] {self._instrument} step ({self.n_entry}) -> {pos} at ${ask:.3f} stop: {ask - self.stop_mx * tr:.3f}, next: {self.next_level:.3f}'
+                )
 
         elif signal_qty < 0:
             # open initial long
             pos = -self.size
             self.stop_at(signal_time, bid + self.stop_mx * tr)
             self.next_level = bid - self.next_mx * tr 
-            self.debug(
-                f'[{quote_time}] {self._instrument} step ({self.n_entry}) -> {pos} at ${bid:.3f} stop: {bid + self.stop_mx * tr:.3f}, next: {self.next_level:.3f}'
-            )
+            if self._is_debug:
+                self.debug(
+                    f'[{quote_time}] {self._instrument} step ({self.n_entry}) -> {pos} at ${bid:.3f} stop: {bid + self.stop_mx * tr:.3f}, next: {self.next_level:.3f}'
+                )
             self.n_entry = 1
 
         return pos
@@ -153,21 +195,38 @@ class Pyramiding(TakeStopTracker):
 class RADChandelier(TakeStopTracker):
     """
     RAD chandelier position tracker (no pyramiding only trailing stop)
+
+    If ohlc bars (of tracker's timeframe) are passed, side and stop levels are precomputed for all bars
+    (see rad_levels) and just looked up by bar index on quotes instead of being updated from attached indicators.
     """
-    def __init__(self, size, timeframe, period, stop_risk_mx, atr_smoother='sma', debug=False):
+    def __init__(self, size, timeframe, period, stop_risk_mx, atr_smoother='sma', debug=False, ohlc=None):
         super().__init__(debug)
         self.timeframe = timeframe
         self.period = period
         self.position_size = size
         self.stop_risk_mx = abs(stop_risk_mx)
         self.atr_smoother = atr_smoother
+        self.levels = rad_levels(ohlc, period, self.stop_risk_mx, atr_smoother) if ohlc is not None else None
 
     def initialize(self):
+        if self.levels is not None:
+            self._bar_times = self.levels.index
+            self._bar_times_ns = self._bar_times.asi8
+            self._sides = self.levels.Side.values.astype(int).tolist()
+            self._levels = self.levels.Level.values.tolist()
+            self._short_stops = self.levels.ShortStop.values.tolist()
+            self._long_stops = self.levels.LongStop.values.tolist()
+            self._bar_stops = None, None
+            self._next_bar_time = self._bar_times[0] if len(self._bar_times) else pd.Timestamp.max
+            self.level = None
+            self.side = 0
+            self._dbg_values = {}
+            return
+
         self.atr = ATR(self.period, self.atr_smoother)
-        self.mm = MovingMinMax(self.period)
+        self.mm = RollingMinMax(self.period)
         self.ohlc = self.get_ohlc_series(self.timeframe)
-        self.ohlc.attach(self.atr)
-        self.ohlc.attach(self.mm)
+        self._last_bar_time = None
         
         # current stop level
         self.level = None
@@ -181,13 +240,22 @@ class RADChandelier(TakeStopTracker):
         return super().statistics()
 
     def get_stops(self):
+        if self.levels is not None:
+            return self._bar_stops
         return self._stops(1)
     
+    def _update_indicators(self):
+        # streaming indicators are updated by every bar completed since last update
+        for b in _bars_closed_since(self.ohlc, self._last_bar_time):
+            self.atr.update(b.high, b.low, b.close)
+            self.mm.update(b.low, b.high)
+            self._last_bar_time = b.time
+
     def _stops(self, n):
-        av, m = self.atr[n], self.mm[n]
-        if av is None or m is None:
+        # n is bar's index in ohlc series (1 is last completed bar)
+        if len(self.mm) < n:
             return None, None
-        ll, hh = m
+        av, (ll, hh) = self.atr[n - 1], self.mm[n - 1]
         if not np.isfinite(av) or not np.isfinite(ll) or not np.isfinite(hh):
             return None, None
         l_stop = hh - self.stop_risk_mx * av
@@ -199,6 +267,7 @@ class RADChandelier(TakeStopTracker):
             return False
         
         # new bar just started
+        self._update_indicators()
         s2, l2 = self._stops(2)
         s1, l1 = self._stops(1)
         if s2 is None:
@@ -221,9 +290,25 @@ class RADChandelier(TakeStopTracker):
         if self.side < 0:
             self.level = min(self.level, s1)
             
+    def _lookup_stop_level(self, quote_time):
+        if quote_time < self._next_bar_time:
+            return
+
+        # quote is from new bar: find it and take precomputed values
+        i = np.searchsorted(self._bar_times_ns, pd.Timestamp(quote_time).value, side='right') - 1
+        self.side = self._sides[i]
+        level = self._levels[i]
+        self.level = level if np.isfinite(level) else None
+        s_stop, l_stop = self._short_stops[i], self._long_stops[i]
+        self._bar_stops = (s_stop, l_stop) if np.isfinite(s_stop) and np.isfinite(l_stop) else (None, None)
+        self._next_bar_time = self._bar_times[i + 1] if i + 1 < len(self._bar_times) else pd.Timestamp.max
+
     def on_quote(self, quote_time, bid, ask, bid_size, ask_size, **kwargs):
         # refresh current stop level
-        self.update_stop_level()
+        if self.levels is not None:
+            self._lookup_stop_level(quote_time)
+        else:
+            self.update_stop_level()
         
         if self.side == 0 or self.level is None:
             return None
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.data import make_forward_returns_matrix
+
+
+def _ohlc(index, seed):
+    r = np.random.RandomState(seed)
+    c = 100 + np.cumsum(r.randn(len(index)))
+    return pd.DataFrame({'open': c + 0.1 * r.randn(len(index)), 'high': c + 1, 'low': c - 1, 'close': c}, index=index)
+
+
+@pytest.mark.parametrize('use_open_close', [True, False])
+@pytest.mark.parametrize('shift', [-1, 0, 2])
+def test_forward_returns_panel_equals_single(use_open_close, shift):
+    hourly = pd.date_range('2021-01-01', periods=500, freq='1h')
+    data = {
+        'A': _ohlc(hourly, 1),
+        # sparser instrument: 3 hours bars, ending earlier
+        'B': _ohlc(hourly[::3][:-20], 2),
+    }
+    p = make_forward_returns_matrix(data, 3, use_open_close=use_open_close, shift=shift)
+    assert list(p.columns) == [(k, f) for k in ['A', 'B'] for f in ['F1', 'F2', 'F3']]
+
+    for k, d in data.items():
+        single = make_forward_returns_matrix(d, 3, use_open_close=use_open_close, shift=shift)
+        pd.testing.assert_frame_equal(p[k].loc[d.index], single, check_names=False, check_freq=False)
+        assert p[k].drop(d.index).isna().all().all()
+
+
+def test_forward_returns_single():
+    d = _ohlc(pd.date_range('2021-01-01', periods=10, freq='1h'), 3)
+    r = make_forward_returns_matrix(d, 2, use_open_close=False, shift=0)
+    np.testing.assert_allclose(r.F1.values[:-1], d.close.values[1:] / d.close.values[:-1] - 1)
+    np.testing.assert_allclose(r.F2.values[:-2], d.close.values[2:] / d.close.values[:-2] - 1)
+    assert r.F2.iloc[-2:].isna().all()
+
+    r32 = make_forward_returns_matrix({'A': d, 'B': d.iloc[::2]}, 2, dtype=np.float32)
+    assert (r32.dtypes == np.float32).all()
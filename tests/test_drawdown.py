@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.drawdown import (
+    absmaxdd, absmaxdd_2d, max_drawdown_pct, max_drawdown_pct_2d, drawdown_episodes, dd_freq_stats, flat_periods
+)
+
+
+def _episodes_loop(dd):
+    eps, cur = [], None
+    for i, v in enumerate(dd):
+        if v > 0:
+            if cur is None:
+                cur = [i, i, i, v]
+            elif v > cur[3]:
+                cur[2], cur[3] = i, v
+            cur[1] = i
+        elif cur is not None:
+            eps.append(cur)
+            cur = None
+    if cur is not None:
+        eps.append(cur)
+    return eps
+
+
+def _flat_periods_loop(data, tolerance):
+    periods, s0 = [], 0
+    for si in range(1, len(data)):
+        if data[si] > data[s0] + tolerance / 2 or data[si] < data[s0] - tolerance / 2:
+            if s0 != si - 1:
+                periods.append((s0, si - 1))
+            s0 = si
+    if s0 != len(data) - 1:
+        periods.append((s0, len(data) - 1))
+    return periods
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_drawdown_episodes(seed):
+    pnl = np.random.RandomState(seed).randn(2000).cumsum()
+    mdd, _, _, _, dd = absmaxdd(pnl)
+    ep = drawdown_episodes(dd)
+
+    expected = _episodes_loop(dd)
+    assert len(ep) == len(expected)
+    np.testing.assert_array_equal(ep.start.values, [e[0] for e in expected])
+    np.testing.assert_array_equal(ep.end.values, [e[1] for e in expected])
+    np.testing.assert_array_equal(ep.peak.values, [e[2] for e in expected])
+    np.testing.assert_allclose(ep.depth.values, [e[3] for e in expected])
+    assert (ep.duration == ep.end - ep.start + 1).all()
+    assert ep.depth.max() == pytest.approx(mdd)
+
+    # only the last episode may stay unrecovered
+    assert (ep.recovery.iloc[:-1] > 0).all()
+    last = ep.iloc[-1]
+    assert last.recovery == (-1 if dd[-1] > 0 else last.end + 1 - last.peak)
+
+    stats = dd_freq_stats(dd)
+    assert stats.Occurencies.sum() == len(expected)
+    assert stats.Max.max() == pytest.approx(mdd)
+
+
+def test_drawdown_episodes_no_drawdown():
+    assert drawdown_episodes(np.zeros(10)).empty
+
+
+def test_flat_periods():
+    data = [0, 0.1, 0.2, 5, 5.1, 9, 9.2, 9.1, 9.0]
+    assert flat_periods(data, 1) == [(0, 2), (3, 4), (5, 8)]
+
+    # single point channels are skipped, the last channel lasts till the end
+    assert flat_periods([0, 5, 10, 10.1], 1) == [(2, 3)]
+    assert flat_periods([0, 5, 10], 1) == []
+    assert flat_periods([1], 1) == []
+
+    s = pd.Series(data, index=pd.date_range('2021-01-01', periods=len(data)))
+    assert flat_periods(s, 1)[0] == (s.index[0], s.index[2])
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_flat_periods_random(seed):
+    pnl = np.round(np.random.RandomState(seed).randn(3000).cumsum(), 2)
+    assert flat_periods(pnl, 3) == _flat_periods_loop(pnl, 3)
+
+
+def test_absmaxdd_2d_equals_columns():
+    r = np.random.RandomState(4)
+    pnl = pd.DataFrame(r.randn(1000, 5).cumsum(axis=0), columns=list('abcde'))
+    # growing only column has no drawdown
+    pnl['e'] = np.arange(len(pnl), dtype=float)
+
+    mdd, d_start, d_peak, d_recover = absmaxdd_2d(pnl)
+    assert list(mdd.index) == list(pnl.columns)
+    for c in pnl.columns:
+        m, s, p, rc, _ = absmaxdd(pnl[c].values)
+        assert mdd[c] == pytest.approx(m)
+        assert (d_start[c], d_peak[c], d_recover[c]) == (s, p, rc)
+
+    # plain arrays and vectors are accepted
+    np.testing.assert_allclose(absmaxdd_2d(pnl.values)[0], mdd.values)
+    assert absmaxdd_2d(pnl['a'].values)[0][0] == pytest.approx(mdd['a'])
+
+
+def test_max_drawdown_pct_2d_equals_columns():
+    r = np.random.RandomState(5)
+    rets = pd.DataFrame(0.01 * r.randn(500, 4), columns=list('abcd'))
+    rets.iloc[10:20, 1] = np.nan
+    src = rets.copy()
+
+    mdd = max_drawdown_pct_2d(rets)
+    pd.testing.assert_frame_equal(rets, src)
+    for c in rets.columns:
+        assert mdd[c] == pytest.approx(max_drawdown_pct(rets[c]))
+
+    assert np.isnan(max_drawdown_pct_2d(np.empty((0, 3)))).all()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.drawdown import absmaxdd, max_drawdown_pct
+from tools.analysis.metrics import (
+    sweep_metrics, returns_from_equity, rolling_sharpe, rolling_sortino, rolling_max_drawdown_pct
+)
+
+
+@pytest.fixture
+def returns():
+    r = np.random.RandomState(7)
+    return pd.DataFrame(0.01 * r.randn(600, 4) + 0.0005, columns=['s1', 's2', 's3', 's4'],
+                        index=pd.date_range('2020-01-01', periods=600, freq='B'))
+
+
+def _rolling_max_dd_loop(r, window):
+    out = np.full(len(r), np.nan)
+    for i in range(window - 1, len(r)):
+        eq = np.cumprod(1 + r[i - window + 1:i + 1])
+        peak = np.maximum.accumulate(np.maximum(eq, 1.0))
+        out[i] = min(0.0, ((eq - peak) / peak).min())
+    return out
+
+
+def test_sweep_metrics_equals_columns(returns):
+    m = sweep_metrics(returns, periods=252, risk_free=0.01)
+    assert list(m.index) == list(returns.columns)
+
+    for c in returns.columns:
+        r = returns[c].values
+        ex = r - 0.01 / 252
+        eq = np.cumprod(1 + r)
+        assert m.Sharpe[c] == pytest.approx(np.sqrt(252) * ex.mean() / r.std(ddof=1))
+        assert m.Sortino[c] == pytest.approx(np.sqrt(252) * ex.mean() / np.sqrt((np.minimum(ex, 0) ** 2).mean()))
+        assert m.CAGR[c] == pytest.approx(eq[-1] ** (252 / len(r)) - 1)
+        assert m.MaxDD[c] == pytest.approx(absmaxdd(eq)[0])
+        assert m.MaxDDPct[c] == pytest.approx(max_drawdown_pct(r))
+        assert m.Trades[c] == (r != 0).sum()
+        assert m.HitRate[c] == pytest.approx((r > 0).mean())
+
+    # equity curves are accepted instead of returns
+    equity = 1000 * (1 + returns).cumprod()
+    me = sweep_metrics(equity=equity)
+    for c in equity.columns:
+        e = equity[c].values
+        assert me.MaxDD[c] == pytest.approx(absmaxdd(e)[0])
+        assert me.CAGR[c] == pytest.approx((e[-1] / e[0]) ** (252 / len(e)) - 1)
+
+
+def test_sweep_metrics_trades_from_executions():
+    r = np.array([[0.0], [0.01], [0.02], [-0.01], [-0.02], [0.03], [0.01]])
+    ex = np.array([[1], [0], [0], [-2], [0], [1], [0]])
+    m = sweep_metrics(r, executions=ex, periods=1)
+    # trades: bars 1..3 (0.02), bars 4..5 (0.01), bar 6 is still open (0.01)
+    assert m.Trades[0] == 3
+    assert m.HitRate[0] == pytest.approx(1.0)
+    assert m.AvgTrade[0] == pytest.approx(0.04 / 3)
+    assert m.Turnover[0] == pytest.approx(4 / 7)
+
+    with pytest.raises(ValueError):
+        sweep_metrics(r, executions=ex[1:])
+    with pytest.raises(ValueError):
+        sweep_metrics()
+
+
+def test_returns_from_equity():
+    e = pd.DataFrame({'a': [100., 110., 99.], 'b': [0., 1., 2.]})
+    r = returns_from_equity(e)
+    np.testing.assert_allclose(r.a.values, [0, 0.1, -0.1])
+    # division by zero gives zero returns
+    np.testing.assert_allclose(r.b.values, [0, 0, 1])
+
+
+def test_rolling_ratios(returns):
+    sh = rolling_sharpe(returns, 50, periods=252)
+    so = rolling_sortino(returns, 50, periods=252)
+    for c in returns.columns:
+        r = returns[c]
+        pd.testing.assert_series_equal(sh[c], np.sqrt(252) * r.rolling(50).mean() / r.rolling(50).std(),
+                                       check_names=False)
+        dn = np.sqrt((r.clip(upper=0) ** 2).rolling(50).mean())
+        pd.testing.assert_series_equal(so[c], np.sqrt(252) * r.rolling(50).mean() / dn, check_names=False)
+
+
+@pytest.mark.parametrize('window', [1, 3, 50, 64, 600, 700])
+def test_rolling_max_drawdown_pct(returns, window):
+    r = returns.copy()
+    r.iloc[100, 1] = -1.0
+    r.iloc[200, 2] = np.nan
+    dd = rolling_max_drawdown_pct(r, window)
+    assert dd.index.equals(r.index) and dd.columns.equals(r.columns)
+    for c in r.columns:
+        np.testing.assert_allclose(dd[c].values, _rolling_max_dd_loop(r[c].fillna(0).values, window), atol=1e-12)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.pipeline import Pipeline
+from tools.analysis.timeseries import atr, ema, register_smoother, registered_smoothers, smooth, sma, rsi, _SMOOTHERS
+
+
+@pytest.fixture
+def ohlc():
+    r = np.random.RandomState(5)
+    c = 100 + np.cumsum(r.randn(500))
+    return pd.DataFrame({'open': c, 'high': c + np.abs(r.randn(500)), 'low': c - np.abs(r.randn(500)), 'close': c},
+                        index=pd.date_range('2021-01-01', periods=500, freq='1h'))
+
+
+@pytest.fixture
+def sma3():
+    def _sma3(x, period):
+        return sma(x, period) * 3
+    register_smoother('sma3', _sma3)
+    yield _sma3
+    _SMOOTHERS.pop('sma3', None)
+
+
+def test_pipeline_equals_functions(ohlc):
+    p = Pipeline(ohlc).add('atr', 14).add('ema', 'close', 20).add('rsi', 'close', 14)
+    r = p.compute()
+    np.testing.assert_array_equal(r['atr_14'].values, atr(ohlc, 14).values)
+    np.testing.assert_array_equal(r['ema_close_20'].values, ema(ohlc.close, 20).ravel())
+    np.testing.assert_array_equal(r['rsi_close_14'].values, rsi(ohlc.close, 14).values)
+
+
+def test_smoother_registered_after_import(ohlc, sma3):
+    assert 'sma3' in Pipeline.indicators()
+    r = Pipeline(ohlc).add('sma3', 'close', 10).add('atr', 10, smoother='sma3').compute()
+    np.testing.assert_array_equal(r['sma3_close_10'].values, smooth(ohlc.close, 'sma3', 10).values)
+    np.testing.assert_array_equal(r['atr_10_sma3'].values, atr(ohlc, 10, 'sma3').values)
+
+
+def test_shared_nodes(ohlc):
+    p = Pipeline(ohlc).add('atr', 14).add('bollinger_atr', 20, 14, 2, 'sma', 'sma')
+    p.compute()
+    n = p.n_nodes
+    p.add('atr', 14, name='atr_again').compute()
+    assert p.n_nodes == n
+
+
+def test_unknown_indicator(ohlc):
+    with pytest.raises(ValueError):
+        Pipeline(ohlc).add('no_such_indicator', 'close', 10)
+
+
+def test_registry_capabilities():
+    s = registered_smoothers()
+    assert s['ema'].streaming is not None and s['ema'].batch
+    assert not s['sma'].numba
+
+
+def test_smooth_by_numba_function(ohlc):
+    from numba import njit
+
+    @njit
+    def _double(x, k):
+        return x * k
+
+    r = smooth(ohlc.close, _double, 2)
+    assert isinstance(r, pd.Series) and r.index.equals(ohlc.index)
+    np.testing.assert_array_equal(r.values, ohlc.close.values * 2)
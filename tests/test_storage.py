@@ -0,0 +1,96 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.loaders.data_loaders import SqliteStorage
+
+
+def _ohlc(start, n, freq='1h'):
+    idx = pd.date_range(start, periods=n, freq=freq, name='time')
+    return pd.DataFrame({'open': np.arange(n, dtype=float), 'close': np.arange(n, dtype=float) + 0.5}, index=idx)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / 'test_1H.db')
+    SqliteStorage.close_all()
+
+
+def _write_legacy(db_path, table, data):
+    with sqlite3.connect(db_path) as c:
+        data.to_sql(table, c)
+
+
+def _count(storage, table):
+    return storage.db.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+
+
+def test_migration_keeps_all_rows(db_path):
+    data = _ohlc('1999-12-30', 3000)
+    _write_legacy(db_path, 'SPX', data)
+    s = SqliteStorage(db_path)
+    assert not s.is_epoch_table('SPX')
+    n_before = _count(s, 'SPX')
+
+    new = _ohlc(data.index[-1] + pd.Timedelta('1h'), 10)
+    assert s.write('SPX', new, new.index[0]) == 10
+
+    assert s.is_epoch_table('SPX')
+    assert s.tables() == ['SPX']
+    assert _count(s, 'SPX') == n_before + 10
+    pd.testing.assert_frame_equal(s.load('SPX', '1990-01-01'), pd.concat((data, new)), check_freq=False)
+
+
+def test_failed_migration_leaves_table_untouched(db_path, monkeypatch):
+    _write_legacy(db_path, 'SPX', _ohlc('2021-01-01', 50))
+    s = SqliteStorage(db_path)
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError('insert failed')
+
+    monkeypatch.setattr(s, '_insert_rows', _fail)
+    with pytest.raises(RuntimeError):
+        s.write('SPX', _ohlc('2021-01-10', 5))
+
+    assert s.tables() == ['SPX']
+    assert not s.is_epoch_table('SPX')
+    assert _count(s, 'SPX') == 50
+
+
+def test_write_and_load_range(db_path):
+    s = SqliteStorage(db_path)
+    data = _ohlc('2021-01-01', 100)
+    assert s.write('EURUSD', data) == 100
+    assert s.write('EURUSD', data, data.index[-1] + pd.Timedelta('1h')) == 0
+
+    r = s.load('EURUSD', '2021-01-02 00:00', '2021-01-03 00:00')
+    assert len(r) == 25
+    pd.testing.assert_frame_equal(r, data.loc['2021-01-02 00:00':'2021-01-03 00:00'], check_freq=False)
+    assert s.time_range('EURUSD') == (data.index[0], data.index[-1])
+
+
+def test_load_many(db_path):
+    s = SqliteStorage(db_path)
+    a = _ohlc('2021-01-01', 48)
+    b = _ohlc('2021-01-01 12:00', 24).assign(volume=np.arange(24, dtype=np.int64))
+    s.write('A', a)
+    s.write('B', b)
+
+    t0, t1 = pd.Timestamp('2021-01-01 06:00'), pd.Timestamp('2021-01-02 00:00')
+    r = s.load_many(['B', 'A'], t0, t1)
+    assert list(r.keys()) == ['B', 'A']
+    pd.testing.assert_frame_equal(r['A'], a.loc[t0:t1], check_freq=False)
+    pd.testing.assert_frame_equal(r['B'], b.loc[t0:t1], check_freq=False)
+
+    empty = s.load_many(['A'], '2030-01-01', '2030-02-01')['A']
+    assert len(empty) == 0 and list(empty.columns) == ['open', 'close']
+
+
+def test_wrong_table_names(db_path):
+    s = SqliteStorage(db_path)
+    with pytest.raises(ValueError):
+        s.write('A"; DROP TABLE x; --', _ohlc('2021-01-01', 2))
+    with pytest.raises(ValueError):
+        s.load('MISSING')
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.streaming import EMA, SMA, WMA, KAMA, ATR, RollingMinMax, Bollinger, RSI
+from tools.analysis.timeseries import ema, sma, wma, kama, atr, bollinger, rsi, streaming_smoother
+
+N = 1000
+PERIODS = [1, 2, 5, 14, 50]
+
+
+def _prices(leading_nans=0, interior_nans=False, seed=1):
+    r = np.random.RandomState(seed)
+    x = 100 + np.cumsum(r.randn(N))
+    x[:leading_nans] = np.nan
+    if interior_nans:
+        x[300:303] = np.nan
+        x[600] = np.nan
+    return x
+
+
+def _ohlc(seed=2):
+    r = np.random.RandomState(seed)
+    c = 100 + np.cumsum(r.randn(N))
+    return pd.DataFrame({
+        'open': c, 'high': c + np.abs(r.randn(N)), 'low': c - np.abs(r.randn(N)), 'close': c + 0.3 * r.randn(N)
+    }, index=pd.date_range('2020-01-01', periods=N, freq='1h'))
+
+
+def _stream(indicator, values):
+    return np.array([indicator.update(*v) if isinstance(v, tuple) else indicator.update(v) for v in values],
+                    dtype=np.float64)
+
+
+def _assert_same(streamed, batch):
+    np.testing.assert_array_equal(np.asarray(streamed, dtype=np.float64), np.asarray(batch, dtype=np.float64))
+
+
+@pytest.mark.parametrize('leading_nans', [0, 7])
+@pytest.mark.parametrize('period', PERIODS)
+def test_moving_averages(period, leading_nans):
+    x = _prices(leading_nans)
+    _assert_same(_stream(EMA(period), x), ema(x, period).ravel())
+    _assert_same(_stream(EMA(period, init_mean=False), x), ema(x, period, init_mean=False).ravel())
+    _assert_same(_stream(SMA(period), x), sma(x, period).ravel())
+    _assert_same(_stream(WMA(period), x), wma(x, period).ravel())
+    if period > 1:
+        _assert_same(_stream(KAMA(period), x), kama(x, period).ravel())
+
+
+def test_wma_interior_nans():
+    x = _prices(7, interior_nans=True)
+    _assert_same(_stream(WMA(14), x), wma(x, 14).ravel())
+
+
+@pytest.mark.parametrize('smoother', ['sma', 'ema', 'wma', 'kama'])
+def test_atr(smoother):
+    o = _ohlc()
+    _assert_same(_stream(ATR(14, smoother), list(zip(o.high, o.low, o.close))), atr(o, 14, smoother))
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_rolling_min_max(period):
+    x = pd.Series(_prices(7, interior_nans=True))
+    r = _stream(RollingMinMax(period), x).reshape(-1, 2)
+    _assert_same(r[:, 0], x.rolling(period).min())
+    _assert_same(r[:, 1], x.rolling(period).max())
+
+    o = _ohlc()
+    r = _stream(RollingMinMax(period), list(zip(o.low, o.high))).reshape(-1, 2)
+    _assert_same(r[:, 0], o.low.rolling(period).min())
+    _assert_same(r[:, 1], o.high.rolling(period).max())
+
+
+@pytest.mark.parametrize('leading_nans', [0, 7])
+@pytest.mark.parametrize('period', [2, 5, 14, 50])
+def test_bollinger(period, leading_nans):
+    x = pd.Series(_prices(leading_nans))
+    b = bollinger(x, period, 2, as_frame=True)
+    r = _stream(Bollinger(period), x).reshape(-1, 3)
+    for k, c in enumerate(['Median', 'Upper', 'Lower']):
+        _assert_same(r[:, k], b[c])
+
+
+@pytest.mark.parametrize('smoother', ['sma', 'ema'])
+@pytest.mark.parametrize('leading_nans', [0, 7])
+@pytest.mark.parametrize('period', PERIODS)
+def test_rsi(period, leading_nans, smoother):
+    x = pd.Series(_prices(leading_nans))
+    _assert_same(_stream(RSI(period, smoother), x), rsi(x, period, smoother))
+
+
+def test_history_access():
+    x = _prices()
+    e = streaming_smoother('ema', 10, history=5)
+    r = _stream(e, x)
+    assert e.value == r[-1] and e[0] == r[-1] and e[1] == r[-2]
+    assert len(e) == 5 and np.isnan(e[5])
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.timeseries import pivot_point, rsi, macd, atr, adx
+
+
+def _ohlc(index, seed=1):
+    r = np.random.RandomState(seed)
+    c = 100 + np.cumsum(r.randn(len(index)))
+    return pd.DataFrame({'open': c, 'high': c + np.abs(r.randn(len(index))),
+                         'low': c - np.abs(r.randn(len(index))), 'close': c}, index=index)
+
+
+@pytest.mark.parametrize('timeframe, first_changes', [
+    # periods start at midnight in EET (UTC+2, UTC+3 since last Sunday of March)
+    ('D', ['2020-01-01 22:00', '2020-01-02 22:00']),
+    ('W', ['2020-01-05 22:00', '2020-01-12 22:00']),
+    ('M', ['2020-01-31 22:00', '2020-02-29 22:00', '2020-03-31 21:00']),
+])
+def test_pivot_levels_start_from_next_period(timeframe, first_changes):
+    d = _ohlc(pd.date_range('2020-01-01', '2020-04-30', freq='1h'))
+    p = pivot_point(d, timeframe=timeframe, timezone='EET').P
+    changes = p.index[p.ne(p.shift()) & p.notna()]
+    assert list(changes[:len(first_changes)]) == [pd.Timestamp(t) for t in first_changes]
+
+
+def test_pivot_monthly_levels_values():
+    d = _ohlc(pd.date_range('2020-01-01', '2020-03-31', freq='1h'))
+    p = pivot_point(d, timeframe='M', timezone=None)
+    jan = d[:'2020-01-31']
+    pvt = (jan.high.max() + jan.low.min() + jan.close.iloc[-1]) / 3
+    assert p.P[:'2020-01-31'].isna().all()
+    assert (p.P['2020-02-01':'2020-02-29'] == pvt).all()
+
+
+def _panel(with_nans=True):
+    hourly = pd.date_range('2021-01-01', periods=800, freq='1h')
+    r = np.random.RandomState(7)
+    a = _ohlc(hourly, 1)
+    # instrument with missing bars which ends earlier
+    b = _ohlc(hourly[(r.rand(len(hourly)) > 0.1)][:-50], 2)
+    if with_nans:
+        # and nan values inside
+        a.iloc[300:302] = np.nan
+        b.iloc[5, b.columns.get_loc('close')] = np.nan
+    return {'A': a, 'B': b}
+
+
+# kama can't be calculated over series with nans inside
+@pytest.mark.parametrize('smoother, with_nans', [('sma', True), ('ema', True), ('kama', False)])
+def test_panel_indicators_equal_single_series(smoother, with_nans):
+    data = _panel(with_nans)
+    p_rsi, p_macd, p_atr = rsi(data, 14, smoother), macd(data, 12, 26, 9, smoother, smoother), atr(data, 14, smoother)
+    p_adx = adx(data, 14, smoother)
+
+    for k, d in data.items():
+        other = p_rsi.index.difference(d.index)
+        for p, single in [(p_rsi, rsi(d.close, 14, smoother)), (p_macd, macd(d.close, 12, 26, 9, smoother, smoother)),
+                          (p_atr, atr(d, 14, smoother))]:
+            np.testing.assert_array_equal(p[k].loc[d.index].values, single.values)
+            assert p[k].loc[other].isna().all()
+
+        for p, single in zip(p_adx, adx(d, 14, smoother)):
+            np.testing.assert_array_equal(p[k].loc[d.index].values, single.values)
+
+
+def test_frame_columns_equal_single_series():
+    data = _panel()
+    closes = pd.DataFrame({k: d.close for k, d in data.items()})
+    for f in [lambda x: rsi(x, 14), lambda x: rsi(x, 14, 'ema'), lambda x: macd(x, 12, 26, 9)]:
+        p = f(closes)
+        for c in closes.columns:
+            np.testing.assert_array_equal(p[c].values, f(closes[c]).values)
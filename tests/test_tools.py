@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.analysis.tools import retain_columns_and_join, srows, scols
+
+
+def _frame(index, seed):
+    r = np.random.RandomState(seed)
+    n = len(index)
+    return pd.DataFrame({
+        'close': 100 + r.randn(n).cumsum(),
+        'volume': r.randint(1, 1000, n),
+        'flag': r.rand(n) > 0.5,
+        'tag': np.array(['x', 'y', 'z'])[r.randint(0, 3, n)],
+        'time': index + pd.Timedelta('1min'),
+        'close32': r.randn(n).astype(np.float32),
+    }, index=index)
+
+
+def _concat(data, columns, join='outer'):
+    return pd.concat([d[columns] for d in data.values()], axis=1, keys=list(data.keys()), join=join)
+
+
+@pytest.fixture
+def panel():
+    hourly = pd.date_range('2021-01-01', periods=100, freq='1h', name='time')
+    return {
+        'A': _frame(hourly, 1),
+        'B': _frame(hourly[::2], 2),
+        'C': _frame(hourly[10:-10], 3),
+    }
+
+
+@pytest.mark.parametrize('join', ['outer', 'inner'])
+@pytest.mark.parametrize('columns', [
+    'close', ['close', 'close32'], ['close', 'volume'], ['close', 'tag'], ['flag', 'time', 'close'], 'volume',
+])
+def test_join_equals_concat(panel, join, columns):
+    r = retain_columns_and_join(panel, columns, join=join)
+    pd.testing.assert_frame_equal(r, _concat(panel, columns, join), check_freq=False)
+    assert r.index.name == 'time'
+
+
+@pytest.mark.parametrize('columns', ['volume', 'flag', ['close', 'tag', 'time'], ['volume', 'close32']])
+def test_join_same_index_keeps_dtypes(panel, columns):
+    data = {'A': panel['A'], 'D': _frame(panel['A'].index, 4)}
+    r = retain_columns_and_join(data, columns)
+    # dtypes are checked here too
+    pd.testing.assert_frame_equal(r, _concat(data, columns))
+
+
+def test_join_unsorted_and_duplicated_indexes(panel):
+    data = {'A': panel['A'].iloc[::-1], 'B': panel['B']}
+    pd.testing.assert_frame_equal(retain_columns_and_join(data, ['close', 'tag']), _concat(data, ['close', 'tag']))
+
+    # duplicated labels are left to pandas
+    data = {'A': pd.concat([panel['A'].iloc[:3], panel['A'].iloc[2:5]]), 'B': panel['B'].iloc[:2]}
+    pd.testing.assert_frame_equal(retain_columns_and_join(data, 'close'), _concat(data, 'close'))
+
+
+def test_join_wrong_arguments(panel):
+    with pytest.raises(ValueError):
+        retain_columns_and_join(list(panel.values()), 'close')
+    with pytest.raises(ValueError):
+        retain_columns_and_join(panel, 'close', join='left')
+
+
+def _sorted_series(n, seed, index_type='datetime'):
+    r = np.random.RandomState(seed)
+    labels = np.sort(r.choice(500, n))
+    index = pd.Timestamp('2021-01-01') + pd.to_timedelta(labels, unit='min') if index_type == 'datetime' else \
+        labels.astype(index_type)
+    return pd.Series(r.randn(n), index=index, name='x')
+
+
+@pytest.mark.parametrize('keep', ['all', 'first', 'last'])
+@pytest.mark.parametrize('index_type', ['datetime', 'int64', 'float64'])
+def test_srows_merge_equals_sorted_concat(keep, index_type):
+    xs = [_sorted_series(n, s, index_type) for s, n in enumerate([50, 0, 200, 77, 300])]
+    for k in range(1, len(xs) + 1):
+        expected = pd.concat(xs[:k]).sort_index(kind='stable')
+        if keep != 'all':
+            expected = expected[~expected.index.duplicated(keep=keep)]
+        pd.testing.assert_series_equal(srows(*xs[:k], keep=keep), expected)
+
+    # frames and unsorted inputs
+    fs = [x.to_frame() for x in xs]
+    pd.testing.assert_frame_equal(srows(*fs), pd.concat(fs).sort_index(kind='stable'))
+    xs[2] = xs[2].iloc[::-1]
+    pd.testing.assert_series_equal(srows(*xs), pd.concat(xs).sort_index(kind='stable'))
+
+
+def test_srows_string_index_and_no_sort():
+    a = pd.DataFrame([1, 2, 3, 4, -4], list('abcud'))
+    b = pd.DataFrame([111, 21, 31, 14], list('xyzu'))
+    pd.testing.assert_frame_equal(srows(a, b, keep='last'), pd.DataFrame([1, 2, 3, -4, 14, 111, 21, 31], list('abcduxyz')))
+    pd.testing.assert_frame_equal(srows(a, b, sort=False), pd.concat([a, b]))
+
+
+def test_scols():
+    idx = pd.date_range('2021-01-01', periods=10)
+    a, b = pd.Series(np.arange(10.), idx, name='a'), pd.Series(np.arange(10), idx, name='b')
+    pd.testing.assert_frame_equal(scols(a, b), pd.concat([a, b], axis=1))
+    pd.testing.assert_frame_equal(scols(a, b, keys=['x', 'y']), pd.concat([a, b], axis=1, keys=['x', 'y']))
+    pd.testing.assert_frame_equal(scols(a, b.iloc[2:]), pd.concat([a, b.iloc[2:]], axis=1))
+    assert list(scols(a, b, names=['u', 'v']).columns) == ['u', 'v']
+    with pytest.raises(ValueError):
+        scols(a, b, names=['u'])
@@ -1,2 +1,5 @@
-from .drawdown import absmaxdd, dd_freq_stats
+from .drawdown import (
+    absmaxdd, absmaxdd_2d, max_drawdown_pct, max_drawdown_pct_2d, dd_freq_stats, drawdown_episodes, flat_periods
+)
+from .metrics import sweep_metrics, returns_from_equity, rolling_sharpe, rolling_sortino, rolling_max_drawdown_pct
 from .tools import add_constant, shift, column_vector, isscalar, sink_nans_down, lift_nans_up, nans
@@ -6,52 +6,75 @@ from typing import Union
 from pandas.core.generic import NDFrame
 from itertools import product
 
+from .tools import column_vector, retain_columns_and_join, _panel_rows, _over_own_rows
 
-def make_forward_returns_matrix(x: pd.DataFrame, n_forward_bars=1, use_open_close=True, use_usd_rets=False, shift=-1):
+
+def make_forward_returns_matrix(x: Union[pd.DataFrame, dict], n_forward_bars=1, use_open_close=True, use_usd_rets=False,
+                                shift=-1, dtype=np.float64):
     """
     Forward returns matrix generator
     --------------------------------
-    :param x: OHLC data frame
+    All horizons are built at once from strided view over closes (so there is no any shifted copy per horizon).
+
+    :param x: OHLC data frame or dictionary of OHLC frames (for panel of instruments).
+              For dictionary result has columns (instrument, Fi) on joined index, horizons are counted
+              in every instrument's own bars.
     :param n_forward_bars: number of bars used for forward returns calculations (F1 - 1 bar, F2 - 2 bars, ... )
     :param use_open_close: return = close/open - 1 (True)
     :param use_usd_rets: use raw difference as returns instead of percentage (False)
     :param shift: number of bars to be shifted (default is -1 - one bar back)
+    :param dtype: type of calculated returns (np.float32 may be used to reduce memory)
     """
     n_forward_bars = max(abs(n_forward_bars),1)
-    d = {}
-    
-    for i in range(1, n_forward_bars + 1):
-        n_ = 'F%d' % i
-        if use_open_close:
-            if use_usd_rets:
-                d.update({n_ : x.close.shift(-i+1) - x.open})
-            else:
-                d.update({n_ : x.close.shift(-i+1) / x.open - 1})
-        else:
-            if use_usd_rets:
-                d.update({n_ : x.close.shift(-i) - x.close})
-            else:
-                d.update({n_ : x.close.shift(-i) / x.close - 1})
-                
-    # we need forward return at current moment so shift back it
-    return pd.DataFrame(d, index=x.index).shift(shift)
 
+    rows = None
+    if isinstance(x, dict):
+        keys = list(x.keys())
+        closes = retain_columns_and_join(x, 'close')
+        index = closes.index
+        c = closes[keys].values.astype(dtype)
+        o = retain_columns_and_join(x, 'open')[keys].values.astype(dtype) if use_open_close else c
+        rows = _panel_rows(x, index)
+        rows = None if rows.all() else rows
+    else:
+        keys = None
+        index = x.index
+        c = column_vector(x.close).astype(dtype)
+        o = column_vector(x.open).astype(dtype) if use_open_close else c
 
-def retain_columns_and_join(data: dict, columns):
-    """
-    Retains given columns from every value of data dictionary and concatenate them into single data frame    
+    def _forward_returns(c, o):
+        n, m = c.shape
 
-    closes = retain_columns_and_join(data, 'close')
-    hi_lo = retain_columns_and_join(data, ['high', 'low'])
+        # view (bars x instruments x horizon) over closes padded by nans: w[t, :, k] = close[t + k]
+        c_pad = np.concatenate((c, np.full((n_forward_bars + 1, m), np.nan, dtype=c.dtype)), axis=0)
+        w = np.lib.stride_tricks.sliding_window_view(c_pad, n_forward_bars + 1, axis=0)[:n]
 
-    :param data: dictionary with dataframes  
-    :param columns: columns names need to be retained 
-    :return: data frame 
-    """
-    if not isinstance(data, dict):
-        raise ValueError('Data must be passed as dictionary')
+        # F_i = close[t + i - 1] vs open[t] or close[t + i] vs close[t]
+        fwd = w[:, :, :n_forward_bars] if use_open_close else w[:, :, 1:]
+        base = o[:, :, np.newaxis]
+        r = (fwd - base) if use_usd_rets else (fwd / base - 1)
+
+        # we need forward return at current moment so shift back it
+        if shift != 0:
+            r = _shift_rows(r, shift)
+        return tuple(r[:, :, i] for i in range(n_forward_bars))
+
+    # horizons of every instrument are calculated over its own bars
+    r = np.stack(_over_own_rows(_forward_returns, rows, c, o), axis=2).reshape(len(index), -1)
 
-    return pd.concat([data[k][columns] for k in data.keys()], axis=1, keys=data.keys())
+    f_names = ['F%d' % i for i in range(1, n_forward_bars + 1)]
+    columns = pd.MultiIndex.from_product([keys, f_names]) if keys is not None else f_names
+    return pd.DataFrame(r, index=index, columns=columns)
+
+
+def _shift_rows(x: np.ndarray, n: int) -> np.ndarray:
+    e = np.full_like(x, np.nan)
+    if abs(n) < x.shape[0]:
+        if n > 0:
+            e[n:] = x[:-n]
+        else:
+            e[:n] = x[-n:]
+    return e
 
 
 def permutate_params(parameters: dict, conditions:Union[types.FunctionType, list, tuple]=None) -> list([dict]):
@@ -2,6 +2,8 @@
 import numpy as np
 import pandas as pd
 
+from .tools import njit
+
 
 def absmaxdd(data):
     """
@@ -78,14 +80,150 @@ def max_drawdown_pct(returns):
     if isinstance(returns, pd.Series):
         returns = returns.values
 
-    # drop nans
-    returns[np.isnan(returns) | np.isinf(returns)] = 0.0
+    # drop nans (input is not modified)
+    returns = np.where(np.isfinite(returns), returns, 0.0)
 
     cumrets = 100*(returns + 1).cumprod(axis=0)
     max_return = np.fmax.accumulate(cumrets)
     return np.nanmin((cumrets - max_return) / max_return)
 
 
+@njit
+def _absmaxdd_2d(x):
+    n, m = x.shape
+    run_max = np.full(m, -np.inf)
+    mdd = np.zeros(m)
+    last_zero = np.zeros(m, dtype=np.int64)
+    d_start = np.zeros(m, dtype=np.int64)
+    d_peak = np.zeros(m, dtype=np.int64)
+    d_recover = np.full(m, -1, dtype=np.int64)
+
+    # rows are outer loop so state is updated along memory layout of C-ordered matrix
+    for i in range(n):
+        for j in range(m):
+            v = x[i, j]
+            if v > run_max[j]:
+                run_max[j] = v
+            dd = run_max[j] - v
+            if dd == 0:
+                if d_recover[j] < 0:
+                    d_recover[j] = i
+                last_zero[j] = i
+            elif dd > mdd[j]:
+                mdd[j] = dd
+                d_peak[j] = i
+                d_start[j] = last_zero[j]
+                d_recover[j] = -1
+
+    for j in range(m):
+        if mdd[j] == 0:
+            d_start[j] = d_peak[j] = d_recover[j] = 0
+        elif d_recover[j] < 0:
+            d_recover[j] = n - 1
+
+    return mdd, d_start, d_peak, d_recover
+
+
+def absmaxdd_2d(data):
+    """
+    Maximum absolute drawdowns for every column of (time x strategies) matrix in one compiled pass.
+    Results are the same as from absmaxdd applied to every column.
+
+    :param data: 2D numpy array or pandas DataFrame (every column is strategy's cumulative PnL)
+    :return: (max_abs_dd, d_start, d_peak, d_recovered) arrays (or Series indexed by columns for DataFrame input)
+    """
+    columns = data.columns if isinstance(data, pd.DataFrame) else None
+    x = np.asarray(data, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, np.newaxis]
+
+    r = _absmaxdd_2d(np.ascontiguousarray(x))
+
+    if columns is not None:
+        return tuple(pd.Series(v, index=columns) for v in r)
+    return r
+
+
+def max_drawdown_pct_2d(returns):
+    """
+    Maximum drawdown in percents for every column of (time x strategies) matrix of returns.
+    Input is not modified.
+
+    :param returns: 2D numpy array or pandas DataFrame of noncumulative returns
+    :return: maximum drawdowns in percents (array or Series indexed by columns for DataFrame input)
+    """
+    columns = returns.columns if isinstance(returns, pd.DataFrame) else None
+    r = np.asarray(returns, dtype=np.float64)
+    if r.ndim == 1:
+        r = r[:, np.newaxis]
+
+    if r.shape[0] < 1:
+        mdd = np.full(r.shape[1], np.nan)
+    else:
+        cumrets = 100 * np.cumprod(np.where(np.isfinite(r), r, 0.0) + 1, axis=0)
+        max_return = np.fmax.accumulate(cumrets, axis=0)
+        mdd = np.nanmin((cumrets - max_return) / max_return, axis=0)
+
+    return pd.Series(mdd, index=columns) if columns is not None else mdd
+
+
+@njit
+def _drawdown_episodes(dd: np.ndarray):
+    """
+    Finds all drawdown episodes (continuous runs where dd > 0) in one pass
+    """
+    n = len(dd)
+    starts = np.empty(n, dtype=np.int64)
+    ends = np.empty(n, dtype=np.int64)
+    peaks = np.empty(n, dtype=np.int64)
+    depths = np.empty(n, dtype=np.float64)
+    k = 0
+    in_dd = False
+    for i in range(n):
+        v = dd[i]
+        if v > 0:
+            if not in_dd:
+                in_dd = True
+                starts[k] = i
+                peaks[k] = i
+                depths[k] = v
+            elif v > depths[k]:
+                peaks[k] = i
+                depths[k] = v
+            ends[k] = i
+        elif in_dd:
+            in_dd = False
+            k += 1
+    if in_dd:
+        k += 1
+    return starts[:k], ends[:k], peaks[:k], depths[:k]
+
+
+def drawdown_episodes(draw_down_series):
+    """
+    All drawdown episodes from drawdown series (as returned by absmaxdd)
+
+    :param draw_down_series: drawdown series (pandas/numpy/list)
+    :return: frame with episodes:
+            start - index (position) where drawdown starts
+            peak - index (position) of drawdown's maximum
+            end - last index (position) of drawdown
+            duration - number of bars in drawdown
+            depth - maximal drawdown value
+            recovery - number of bars from peak to recovery (-1 if drawdown is not recovered)
+    """
+    dd = np.asarray(draw_down_series.values if isinstance(draw_down_series, pd.Series) else draw_down_series,
+                    dtype=np.float64)
+    starts, ends, peaks, depths = _drawdown_episodes(dd)
+    recovered = ends + 1 < len(dd)
+    return pd.DataFrame({
+        'start': starts, 'peak': peaks, 'end': ends,
+        'duration': ends - starts + 1,
+        'depth': depths,
+        'recovery': np.where(recovered, ends + 1 - peaks, -1),
+    })
+
+
 def dd_freq_stats(draw_down_series):
     """
     Calculates drawdown frequencies statistics
@@ -115,49 +253,56 @@ def dd_freq_stats(draw_down_series):
     \(c\) 2016, http://www.appliedalpha.com
 
     """
-    f2 = pd.DataFrame(draw_down_series.values, columns=['dd'], index=range(0, len(draw_down_series)))
-    f2['t'] = f2['dd'] > 0
-    fst = f2.index[f2['t'] & ~ f2['t'].shift(1).fillna(False)]
-    lst = f2.index[f2['t'] & ~ f2['t'].shift(-1).fillna(False)]
-
-    dd_periods = pd.DataFrame(
-        data=np.array([(j - i + 1, max(draw_down_series.iloc[i:j + 1])) for i, j in zip(fst, lst)],
-                      dtype=[('duration', np.uint8), ('m', np.float64)]), columns=['duration', 'm']
+    dd_periods = drawdown_episodes(draw_down_series)[['duration', 'depth']]
+    return dd_periods.groupby(by='duration')['depth'].agg(
+        Occurencies='size', AvgMagnitude='mean', Max='max', Min='min'
     )
 
-    dx = dd_periods.groupby(by='duration').agg([len, np.average, np.max, np.min]). \
-        rename(columns={'len': 'Occurencies', 'average': 'AvgMagnitude', 'amax': 'Max', 'amin': 'Min'})
 
-    return dx.xs('m', axis=1, drop_level=True)
+@njit
+def _flat_periods(data: np.ndarray, tolerance: float):
+    n = len(data)
+    p = np.empty((n, 2), dtype=np.int64)
+    k = 0
+    s0 = 0
+    s_up = data[0] + tolerance / 2
+    s_dw = data[0] - tolerance / 2
+    for si in range(1, n):
+        if data[si] > s_up or data[si] < s_dw:
+            # skip single point
+            if s0 != si - 1:
+                p[k, 0] = s0
+                p[k, 1] = si - 1
+                k += 1
+            s_up = data[si] + tolerance / 2
+            s_dw = data[si] - tolerance / 2
+            s0 = si
+
+    # last channel lasts till the end of data
+    if s0 != n - 1:
+        p[k, 0] = s0
+        p[k, 1] = n - 1
+        k += 1
+    return p[:k]
 
 
 def flat_periods(pnl_series, tolerance):
     """
-    Flat PnL periods finder.
-
-    TODO: need to port it from Matlab
-    TODO: also add statistics of found flat periods
-
-    function [p] = flatperiods(data, tolerance)
-        p = [];
-        s0 = 1;
-        sUp = data(s0) + tolerance/2;
-        sDw = data(s0) - tolerance/2;
-        for si = 2:length(data)
-            if data(si) > sUp || data(si) < sDw
-                if s0 ~= si-1 % skip single point
-                    p = [p;  [s0 si-1]];
-                end
-                sUp = data(si) + tolerance/2;
-                sDw = data(si) - tolerance/2;
-                s0 = si;
-                continue
-            end
-        end
-    end
+    Flat PnL periods finder (port of Matlab's flatperiods).
+
+    Period is flat while every value stays inside channel of tolerance size centered at period's first value.
+    When value leaves the channel new channel is started from this value. Single point periods are skipped.
 
     :param pnl_series: cumulative PnL series (pandas/numpy/list should be accepted)
     :param tolerance: channel size considered as flat period
-    :return: should return set (or list) of indexes where flat periods are found
+    :return: list of (start, end) indexes of found flat periods (index labels for pandas series, positions otherwise)
     """
-    raise NotImplementedError("Not yet implemented !!!")
\ No newline at end of file
+    data = np.asarray(pnl_series.values if isinstance(pnl_series, pd.Series) else pnl_series, dtype=np.float64)
+    if len(data) < 2:
+        return []
+
+    p = _flat_periods(data, float(tolerance))
+    if isinstance(pnl_series, pd.Series):
+        idx = pnl_series.index
+        return [(idx[s], idx[e]) for s, e in p]
+    return [(s, e) for s, e in p.tolist()]
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+from .drawdown import absmaxdd_2d, max_drawdown_pct_2d
+from .tools import njit
+
+
+def _as_matrix(x):
+    """
+    Convert input into 2D float array (time x strategies) and return it with columns and index
+    """
+    columns, index = None, None
+    if isinstance(x, pd.DataFrame):
+        columns, index = x.columns, x.index
+    elif isinstance(x, pd.Series):
+        columns, index = pd.Index([x.name]), x.index
+    m = np.asarray(x, dtype=np.float64)
+    if m.ndim == 1:
+        m = m[:, np.newaxis]
+    if columns is None:
+        columns = pd.RangeIndex(m.shape[1])
+    return m, columns, index
+
+
+def returns_from_equity(equity):
+    """
+    Simple returns from equity curves (first row is 0)
+
+    :param equity: equity curves (2D numpy array or DataFrame, every column is strategy)
+    :return: returns of same shape and type
+    """
+    e, columns, index = _as_matrix(equity)
+    r = np.zeros_like(e)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r[1:] = e[1:] / e[:-1] - 1
+    r[~np.isfinite(r)] = 0.0
+    return pd.DataFrame(r, index=index, columns=columns) if isinstance(equity, pd.DataFrame) else r
+
+
+@njit
+def _trades_returns(r, executions):
+    """
+    Accumulated returns of holding periods between executions (every holding period is one trade).
+    Returns (number of trades, number of profitable trades, sum of trades returns) per column.
+    """
+    n, m = r.shape
+    n_trades = np.zeros(m, dtype=np.int64)
+    n_wins = np.zeros(m, dtype=np.int64)
+    total = np.zeros(m)
+    acc = np.zeros(m)
+    is_open = np.zeros(m, dtype=np.bool_)
+
+    for i in range(n):
+        for j in range(m):
+            # return of bar i is earned by position held before execution at bar i
+            if is_open[j]:
+                acc[j] += r[i, j]
+            e = executions[i, j]
+            if e != 0 and e == e:
+                if is_open[j]:
+                    n_trades[j] += 1
+                    n_wins[j] += acc[j] > 0
+                    total[j] += acc[j]
+                acc[j] = 0.0
+                is_open[j] = True
+
+    # last open trade is marked to market
+    for j in range(m):
+        if is_open[j] and acc[j] != 0:
+            n_trades[j] += 1
+            n_wins[j] += acc[j] > 0
+            total[j] += acc[j]
+
+    return n_trades, n_wins, total
+
+
+def sweep_metrics(returns=None, equity=None, executions=None, periods=252, risk_free=0.0) -> pd.DataFrame:
+    """
+    Performance metrics for all columns (strategies) of returns or equity matrix in one pass.
+    It's intended for ranking parameters sweep results without per-strategy loops.
+
+    Trades are holding periods between executions (if executions are passed) or every bar with non zero return.
+
+    :param returns: matrix of simple returns (time x strategies), numpy array or DataFrame
+    :param equity: matrix of equity curves (used if returns is not specified)
+    :param executions: optional matrix of executed quantities (same shape, non zero where position was changed),
+                       turnover is average sum of absolute executions per year
+    :param periods: number of periods per year (252 for daily data)
+    :param risk_free: annual risk free rate
+    :return: frame with Sharpe, Sortino, CAGR, MaxDD, MaxDDPct, HitRate, AvgTrade, Trades, Turnover for every column
+    """
+    if returns is None and equity is None:
+        raise ValueError("Returns or equity must be specified")
+
+    if returns is not None:
+        r, columns, _ = _as_matrix(returns)
+        r = np.where(np.isfinite(r), r, 0.0)
+        eqty = np.cumprod(1 + r, axis=0)
+    else:
+        eqty, columns, _ = _as_matrix(equity)
+        r = returns_from_equity(eqty)
+
+    n = r.shape[0]
+    if n < 2:
+        raise ValueError("At least 2 observations are required")
+
+    excess = r - risk_free / periods
+    mean = excess.mean(axis=0)
+    std = r.std(axis=0, ddof=1)
+    downside = np.sqrt((np.minimum(excess, 0) ** 2).mean(axis=0))
+    ann = np.sqrt(periods)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, ann * mean / std, np.nan)
+        sortino = np.where(downside > 0, ann * mean / downside, np.nan)
+        growth = eqty[-1] / eqty[0] if returns is None else eqty[-1]
+        cagr = np.where(growth > 0, growth ** (periods / n) - 1, -1.0)
+
+    mdd = absmaxdd_2d(eqty)[0]
+    mdd_pct = max_drawdown_pct_2d(r)
+
+    if executions is not None:
+        ex, _, _ = _as_matrix(executions)
+        if ex.shape != r.shape:
+            raise ValueError(f"Executions shape {ex.shape} must be the same as returns shape {r.shape}")
+        n_trades, n_wins, total = _trades_returns(np.ascontiguousarray(r), np.ascontiguousarray(ex))
+        turnover = np.nansum(np.abs(ex), axis=0) * periods / n
+    else:
+        nz = r != 0
+        n_trades, n_wins, total = nz.sum(axis=0), (r > 0).sum(axis=0), r.sum(axis=0)
+        turnover = np.full(r.shape[1], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hit_rate = np.where(n_trades > 0, n_wins / n_trades, np.nan)
+        avg_trade = np.where(n_trades > 0, total / n_trades, np.nan)
+
+    return pd.DataFrame({
+        'Sharpe': sharpe, 'Sortino': sortino, 'CAGR': cagr, 'MaxDD': mdd, 'MaxDDPct': mdd_pct,
+        'HitRate': hit_rate, 'AvgTrade': avg_trade, 'Trades': n_trades, 'Turnover': turnover,
+    }, index=columns)
+
+
+def _rolling_frame(returns):
+    r, columns, index = _as_matrix(returns)
+    return pd.DataFrame(np.where(np.isfinite(r), r, 0.0), index=index, columns=columns)
+
+
+def rolling_sharpe(returns, window, periods=252, risk_free=0.0) -> pd.DataFrame:
+    """
+    Rolling Sharpe ratio for all columns of returns matrix
+
+    :param returns: matrix of simple returns (time x strategies)
+    :param window: rolling window size (in bars)
+    :param periods: number of periods per year
+    :param risk_free: annual risk free rate
+    """
+    r = _rolling_frame(returns)
+    roll = r.rolling(window)
+    std = roll.std()
+    return np.sqrt(periods) * (roll.mean() - risk_free / periods) / std.where(std > 0)
+
+
+def rolling_sortino(returns, window, periods=252, risk_free=0.0) -> pd.DataFrame:
+    """
+    Rolling Sortino ratio for all columns of returns matrix
+
+    :param returns: matrix of simple returns (time x strategies)
+    :param window: rolling window size (in bars)
+    :param periods: number of periods per year
+    :param risk_free: annual risk free rate
+    """
+    r = _rolling_frame(returns) - risk_free / periods
+    downside = np.sqrt((r.clip(upper=0) ** 2).rolling(window).mean())
+    return np.sqrt(periods) * r.rolling(window).mean() / downside.where(downside > 0)
+
+
+@njit
+def _dd_combine(a, b):
+    """
+    Joins drawdown summaries of two adjacent returns segments (a goes before b).
+    Summary of segment (equity starts at 1 there) is (growth, peak, lowest equity, lowest equity / running peak).
+    """
+    g_a, p_a, m_a, d_a = a
+    g_b, p_b, m_b, d_b = b
+    return g_a * g_b, max(p_a, g_a * p_b), min(m_a, g_a * m_b), min(d_a, d_b, g_a * m_b / p_a)
+
+
+@njit
+def _rolling_max_dd_pct(r, window):
+    """
+    Van Herk / Gil-Werman scheme: series is split into blocks of window size and every window is
+    joined from suffix summary of one block and prefix summary of the next one, so it's O(n) per column
+    """
+    n, m = r.shape
+    out = np.full((n, m), np.nan)
+    pre = np.empty((n, 4))
+    suf = np.empty((n, 4))
+    for j in range(m):
+        for i in range(n):
+            e = 1 + r[i, j]
+            leaf = (e, max(1.0, e), e, min(1.0, e))
+            if i % window == 0:
+                pre[i] = leaf
+            else:
+                pre[i] = _dd_combine((pre[i - 1, 0], pre[i - 1, 1], pre[i - 1, 2], pre[i - 1, 3]), leaf)
+
+        for i in range(n - 1, -1, -1):
+            e = 1 + r[i, j]
+            leaf = (e, max(1.0, e), e, min(1.0, e))
+            if i == n - 1 or (i + 1) % window == 0:
+                suf[i] = leaf
+            else:
+                suf[i] = _dd_combine(leaf, (suf[i + 1, 0], suf[i + 1, 1], suf[i + 1, 2], suf[i + 1, 3]))
+
+        for i in range(window - 1, n):
+            s = i - window + 1
+            if s % window == 0:
+                d = pre[i, 3]
+            else:
+                d = _dd_combine((suf[s, 0], suf[s, 1], suf[s, 2], suf[s, 3]),
+                                (pre[i, 0], pre[i, 1], pre[i, 2], pre[i, 3]))[3]
+            out[i, j] = d - 1
+    return out
+
+
+def rolling_max_drawdown_pct(returns, window) -> pd.DataFrame:
+    """
+    Rolling maximum drawdown (as fraction of peak equity) within window for all columns of returns matrix
+
+    :param returns: matrix of simple returns (time x strategies)
+    :param window: rolling window size (in bars)
+    """
+    r = _rolling_frame(returns)
+    return pd.DataFrame(_rolling_max_dd_pct(np.ascontiguousarray(r.values), window),
+                        index=r.index, columns=r.columns)
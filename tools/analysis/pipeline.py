@@ -0,0 +1,256 @@
+from collections import OrderedDict
+from typing import Union
+import types
+
+import numpy as np
+import pandas as pd
+
+from .timeseries import kama, sma, registered_smoothers, _smoother_info, _smooth_values
+
+
+class Pipeline:
+    """
+    Declarative indicators graph over OHLC data.
+
+    Every indicator is decomposed into elementary nodes (columns, diffs, true range, smoothed series etc).
+    Nodes are identified by their definition so any node shared between indicators (for example true range used
+    by atr, adx and bollinger_atr or ema used by macd and by ema itself) is calculated only once.
+    Nodes are evaluated lazily in dependency order over numpy arrays and final result is returned as single frame.
+
+    Example:
+
+    >>> r = Pipeline(ohlc) \\
+    >>>         .add('atr', 14) \\
+    >>>         .add('ema', 'close', 50) \\
+    >>>         .add('adx', 14, smoother='ema') \\
+    >>>         .add('macd', 'close', 12, 26, 9) \\
+    >>>         .add('bollinger', 'close', 20, 2, name='bb') \\
+    >>>         .compute()
+
+    Results are numerically equal to ones from tools.analysis.timeseries functions.
+    """
+
+    def __init__(self, ohlc: pd.DataFrame):
+        if not isinstance(ohlc, pd.DataFrame):
+            raise ValueError("Pipeline input must be DataFrame")
+        self.ohlc = ohlc
+        self._outputs = OrderedDict()
+        self._nodes = {}
+
+    def add(self, indicator: str, *args, name=None, **kwargs):
+        """
+        Add indicator to pipeline
+
+        :param indicator: indicator name (see Pipeline.indicators())
+        :param args: indicator's arguments (series arguments are passed as column names or as pd.Series)
+        :param name: name of output column(s) (default is generated from indicator name and arguments)
+        :param kwargs: indicator's named arguments
+        :return: pipeline itself (so calls can be chained)
+        """
+        if _indicator(indicator) is None:
+            raise ValueError(f"Indicator '{indicator}' is not supported ! Available: {', '.join(self.indicators())}")
+
+        if name is None:
+            name = '_'.join([indicator] + [_arg_name(a) for a in args] + [_arg_name(v) for v in kwargs.values()])
+
+        if name in self._outputs:
+            raise ValueError(f"Output '{name}' is already added to pipeline")
+
+        self._outputs[name] = (indicator, args, kwargs)
+        return self
+
+    def compute(self) -> pd.DataFrame:
+        """
+        Calculate all added indicators
+
+        :return: frame with indicators values aligned to ohlc index
+        """
+        self._nodes = {}
+        result = OrderedDict()
+        for name, (indicator, args, kwargs) in self._outputs.items():
+            r = _indicator(indicator)(self, *args, **kwargs)
+            if isinstance(r, dict):
+                result.update({f'{name}_{k}': v for k, v in r.items()})
+            else:
+                result[name] = r
+
+        return pd.DataFrame(result, index=self.ohlc.index)
+
+    @staticmethod
+    def indicators():
+        """
+        List of supported indicators (all registered smoothers are available as indicators)
+        """
+        return list(dict.fromkeys([*registered_smoothers().keys(), *_INDICATORS.keys()]))
+
+    @property
+    def n_nodes(self):
+        """
+        Number of unique nodes evaluated during last compute call
+        """
+        return len(self._nodes)
+
+    def node(self, key: tuple, func, *deps):
+        """
+        Get node's value identified by key or calculate it (as func(*deps)) if it wasn't evaluated yet.
+        Dependencies are passed as keys of other nodes and are evaluated before this node.
+        """
+        if key not in self._nodes:
+            self._nodes[key] = func(*[self._nodes[d] for d in deps])
+        return key
+
+    def value(self, key: tuple) -> np.ndarray:
+        return self._nodes[key]
+
+    # - - - - elementary nodes - - - -
+
+    def column(self, x: Union[str, pd.Series]) -> tuple:
+        if isinstance(x, str):
+            if x not in self.ohlc.columns:
+                raise ValueError(f"Column '{x}' is not found in input data")
+            return self.node(('column', x), lambda: self.ohlc[x].values.astype(np.float64))
+
+        if isinstance(x, pd.Series):
+            if not x.index.equals(self.ohlc.index):
+                raise ValueError(f"Series '{x.name}' must have same index as pipeline input data")
+            return self.node(('series', id(x)), lambda: x.values.astype(np.float64))
+
+        raise ValueError(f"Only column names or pd.Series are accepted as inputs but got {type(x)}")
+
+    def lag(self, key: tuple) -> tuple:
+        return self.node(('lag', key), _lag, key)
+
+    def diff(self, key: tuple) -> tuple:
+        return self.node(('diff', key), np.subtract, key, self.lag(key))
+
+    def true_range(self) -> tuple:
+        h, l, c = self.column('high'), self.column('low'), self.column('close')
+        pc = self.lag(c)
+        h_l = self.node(('abs_sub', h, l), _abs_sub, h, l)
+        h_pc = self.node(('abs_sub', h, pc), _abs_sub, h, pc)
+        l_pc = self.node(('abs_sub', l, pc), _abs_sub, l, pc)
+        return self.node(('true_range',), _nanmax3, h_l, h_pc, l_pc)
+
+    def smooth(self, key: tuple, stype: Union[str, types.FunctionType], *args) -> tuple:
+        if not isinstance(stype, str) and not callable(stype):
+            raise ValueError("Smoothing method '%s' is not supported !" % stype)
+        info = _smoother_info(stype)
+
+        # functions from the registry and their names are the same nodes
+        stype = info.name if registered_smoothers().get(info.name) is info else stype
+        return self.node(('smooth', stype, args, key), lambda v: _smooth_values(v[:, None], info, *args)[:, 0], key)
+
+
+def _arg_name(a):
+    if isinstance(a, pd.Series):
+        return str(a.name)
+    if callable(a):
+        return getattr(a, '__name__', str(a))
+    return str(a)
+
+
+def _lag(x):
+    r = np.empty_like(x)
+    r[0] = np.nan
+    r[1:] = x[:-1]
+    return r
+
+
+def _abs_sub(x, y):
+    return np.abs(x - y)
+
+
+def _nanmax3(x, y, z):
+    return np.fmax(np.fmax(x, y), z)
+
+
+def _require_ohlc(p: Pipeline):
+    if sum(p.ohlc.columns.isin(['open', 'high', 'low', 'close'])) != 4:
+        raise ValueError("Input series must be DataFrame within 'open', 'high', 'low' and 'close' columns defined !")
+
+
+def _smoother_indicator(stype):
+    def _f(p: Pipeline, x, *args):
+        return p.value(p.smooth(p.column(x), stype, *args))
+    return _f
+
+
+def _atr(p: Pipeline, window=14, smoother='sma'):
+    _require_ohlc(p)
+    return p.value(p.smooth(p.true_range(), smoother, window))
+
+
+def _adx(p: Pipeline, period, smoother=kama):
+    _require_ohlc(p)
+    _atr_k = p.smooth(p.true_range(), smoother, period)
+    _h, _l = p.column('high'), p.column('low')
+    mu = p.diff(_h)
+    md = p.node(('neg', p.diff(_l)), np.negative, p.diff(_l))
+
+    dmp = p.node(('dm', mu, md), lambda u, d: u * (((u > 0) & (u > d)) + 0), mu, md)
+    dmm = p.node(('dm', md, mu), lambda d, u: d * (((d > 0) & (d > u)) + 0), md, mu)
+    dip = p.node(('di', dmp, _atr_k), lambda s, a: 100 * s / a, p.smooth(dmp, smoother, period), _atr_k)
+    dim = p.node(('di', dmm, _atr_k), lambda s, a: 100 * s / a, p.smooth(dmm, smoother, period), _atr_k)
+    dx = p.node(('dx', dip, dim), lambda a, b: np.abs((a - b) / (a + b)), dip, dim)
+    _adx_k = p.smooth(dx, smoother, period)
+
+    return {'ADX': 100 * p.value(_adx_k), 'DIp': p.value(dip), 'DIm': p.value(dim)}
+
+
+def _macd(p: Pipeline, x, fast=12, slow=26, signal=9, method='ema', signal_method='ema'):
+    _x = p.column(x)
+    _f, _s = p.smooth(_x, method, fast), p.smooth(_x, method, slow)
+    x_diff = p.node(('sub', _f, _s), np.subtract, _f, _s)
+    return p.value(p.smooth(x_diff, signal_method, signal))
+
+
+def _bollinger_bands(p: Pipeline, x, window, mean):
+    _x = p.column(x)
+    _m = p.smooth(_x, mean, window)
+    _std = p.node(
+        ('rolling_std', _x, _m, window),
+        lambda v, m: np.sqrt(pd.Series((v - m) ** 2).rolling(window=window).sum().values / (window - 1)),
+        _x, _m
+    )
+    return p.value(_m), p.value(_std)
+
+
+def _bollinger(p: Pipeline, x, window=14, nstd=2, mean='sma'):
+    m, s = _bollinger_bands(p, x, window, mean)
+    return {'Median': m, 'Upper': m + s * nstd, 'Lower': m - s * nstd}
+
+
+def _bollinger_atr(p: Pipeline, window=14, atr_window=14, natr=2, mean='sma', atr_mean='ema'):
+    _require_ohlc(p)
+    b = p.value(p.smooth(p.column('close'), mean, window))
+    a = natr * _atr(p, atr_window, atr_mean)
+    return {'Median': b, 'Upper': b + a, 'Lower': b - a}
+
+
+def _rsi(p: Pipeline, x, periods, smoother=sma):
+    _d = p.diff(p.column(x))
+    _u = p.node(('up_move', _d), lambda d: np.where(d > 0, d, 0), _d)
+    _m = p.node(('down_move', _d), lambda d: np.abs(np.where(d < 0, d, 0)), _d)
+    mu, md = p.value(p.smooth(_u, smoother, periods)), p.value(p.smooth(_m, smoother, periods))
+    return 100 * mu / (mu + md)
+
+
+def _indicator(name):
+    """
+    Indicator's function by name (smoothers are taken from registry at call time so newly registered are available)
+    """
+    if name in _INDICATORS:
+        return _INDICATORS[name]
+    if isinstance(name, str) and name in registered_smoothers():
+        return _smoother_indicator(name)
+    return None
+
+
+_INDICATORS = OrderedDict([
+    ('atr', _atr),
+    ('adx', _adx),
+    ('macd', _macd),
+    ('bollinger', _bollinger),
+    ('bollinger_atr', _bollinger_atr),
+    ('rsi', _rsi),
+])
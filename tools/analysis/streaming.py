@@ -0,0 +1,414 @@
+from collections import deque
+
+import numpy as np
+
+
+class StreamingIndicator:
+    """
+    Base class for stateful indicators updated by one value at a time (for live data).
+
+    >>> i = SomeIndicator(...)
+    >>> for v in values:
+    >>>     i.update(v)
+    >>> i.value, i[1]   # last value and value one step before
+
+    :param history: how many last values are kept for access by index
+    """
+
+    def __init__(self, history=100):
+        self._values = deque(maxlen=max(history, 1))
+
+    def update(self, *args) -> float:
+        """
+        Update indicator by new value (or values for indicators like ATR)
+
+        :return: new indicator's value
+        """
+        v = self._calculate(*args)
+        self._values.appendleft(v)
+        return v
+
+    def _calculate(self, *args) -> float:
+        raise NotImplementedError()
+
+    @property
+    def value(self) -> float:
+        return self._values[0] if self._values else np.nan
+
+    def __getitem__(self, n) -> float:
+        return self._values[n] if n < len(self._values) else np.nan
+
+    def __len__(self):
+        return len(self._values)
+
+
+class HoltWinters(StreamingIndicator):
+    """
+    Streaming Holt-Winters second order smoothing (same values as holt_winters_second_order_ewma)
+
+    :param span: number of data points taken for calculation
+    :param beta: trend smoothing factor, 0 < beta < 1
+    """
+
+    def __init__(self, span, beta=0.1, history=100):
+        if span < 0:
+            raise ValueError("Span value must be positive")
+        super().__init__(history)
+        self.alpha = 2.0 / (1 + span)
+        self.beta = beta
+        self.s = np.nan
+        self.trend = 0.0
+        self._started = False
+
+    def _calculate(self, x) -> float:
+        if not self._started:
+            self.s, self.trend = x, 0.0
+            self._started = True
+            return self.s
+
+        s_prev = self.s
+        self.s = self.alpha * x + (1 - self.alpha) * (s_prev + self.trend)
+        self.trend = self.beta * (self.s - s_prev) + (1 - self.beta) * self.trend
+        return self.s
+
+
+def _smoother(stype, *args):
+    # streaming smoothers are taken from registry (it's imported here to avoid circular imports)
+    from .timeseries import streaming_smoother
+    return streaming_smoother(stype, *args)
+
+
+class EMA(StreamingIndicator):
+    """
+    Streaming exponential moving average (same values as ema)
+
+    :param span: number of data points for smooth
+    :param init_mean: use average of first span points as starting ema value
+    :param min_periods: minimum number of observations required to have a value
+    """
+
+    def __init__(self, span, init_mean=True, min_periods=0, history=100):
+        super().__init__(history)
+        self.span = span
+        self.alpha = 2.0 / (1 + span)
+        self.init_mean = init_mean
+        self.min_periods = min_periods
+        self._n = 0
+        self._sum = 0.0
+        self._s = np.nan
+
+    def _calculate(self, x) -> float:
+        # leading nans are skipped
+        if self._n == 0 and x != x:
+            return np.nan
+
+        self._n += 1
+        if self.init_mean and self._n <= self.span:
+            self._sum += x
+            if self._n < self.span:
+                return np.nan
+            self._s = self._sum / self.span
+        elif self._n == 1:
+            self._s = x
+        else:
+            self._s = self.alpha * x + (1 - self.alpha) * self._s
+
+        return self._s if self._n >= self.min_periods else np.nan
+
+
+class SMA(StreamingIndicator):
+    """
+    Streaming simple moving average (same values as sma: differences of cumulative sums are used)
+
+    :param period: period of smoothing
+    """
+
+    def __init__(self, period, history=100):
+        if period <= 0:
+            raise ValueError('Period must be positive and greater than zero !!!')
+        super().__init__(history)
+        self.period = period
+        self._csum = 0.0
+        self._csums = deque(maxlen=period + 1)
+
+    def _calculate(self, x) -> float:
+        # leading nans are skipped
+        if not self._csums and x != x:
+            return np.nan
+
+        if x == x:
+            self._csum += x
+        self._csums.append(self._csum)
+
+        n = len(self._csums)
+        if n < self.period:
+            return np.nan
+        if n == self.period:
+            return self._csum / self.period
+        return (self._csum - self._csums[0]) / self.period
+
+
+class WMA(StreamingIndicator):
+    """
+    Streaming linearly weighted moving average (same values as wma with linear weights)
+
+    :param period: period of smoothing
+    """
+
+    def __init__(self, period, history=100):
+        super().__init__(history)
+        self.period = period
+        self._norm = period * (period + 1) / 2.0
+        self._window = deque(maxlen=period + 1)
+        self._t = -1
+        self._last_nan = -1
+        self._since = 0
+        self._a, self._s = 0.0, 0.0
+
+    def _calculate(self, x) -> float:
+        self._t += 1
+        self._window.appendleft(x)
+        p, w = self.period, self._window
+        if x != x:
+            self._last_nan = self._t
+            return np.nan
+
+        if self._t - self._last_nan < p:
+            return np.nan
+
+        if self._t - self._last_nan == p or self._since >= p:
+            # direct calculation
+            a, s = 0.0, 0.0
+            for k in range(p):
+                a += (k + 1) * w[k]
+                s += w[k]
+            self._a, self._s = a, s
+            self._since = 0
+        else:
+            x_out = w[p]
+            self._a = self._a + self._s + x - (p + 1) * x_out
+            self._s = self._s + x - x_out
+            self._since += 1
+        return self._a / self._norm
+
+
+class KAMA(StreamingIndicator):
+    """
+    Streaming Kaufman adaptive moving average (same values as kama)
+
+    :param period: period of smoothing
+    :param fast_span: fast period
+    :param slow_span: slow period
+    """
+
+    def __init__(self, period, fast_span=2, slow_span=30, history=100):
+        super().__init__(history)
+        self.period = period
+        self._sc_mx = 2.0 / (fast_span + 1) - 2.0 / (slow_span + 1.0)
+        self._sc_add = 2 / (slow_span + 1.0)
+        self._xs = deque(maxlen=period + 1)
+        self._csums = deque(maxlen=period + 1)
+        self._csum = 0.0
+        self._ama = np.nan
+
+    def _calculate(self, x) -> float:
+        # leading nans are skipped
+        if not self._xs and x != x:
+            return np.nan
+
+        if self._xs:
+            d = abs(x - self._xs[-1])
+            if d == d:
+                self._csum += d
+        self._xs.append(x)
+        self._csums.append(self._csum)
+
+        n, p = len(self._xs), self.period
+        if n < p:
+            return np.nan
+
+        if n == p:
+            # here ama_0 = x_0 but it's not reported (for compatibility with ta-lib)
+            self._ama = x
+            return np.nan
+
+        er = abs(x - self._xs[0]) / (self._csum - self._csums[0])
+        sc = er * self._sc_mx + self._sc_add
+        sc = sc * sc
+        self._ama = self._ama + sc * (x - self._ama)
+        return self._ama
+
+
+class RollingMinMax(StreamingIndicator):
+    """
+    Streaming rolling minimum and maximum (same values as pandas rolling(period).min() / max()).
+    Value is (min, max) tuple. If high is passed to update, maximum is calculated over highs and minimum over lows.
+
+    :param period: window size
+    """
+
+    def __init__(self, period, history=100):
+        super().__init__(history)
+        self.period = period
+        self._t = -1
+        self._last_nan = -1
+        self._mins = deque()
+        self._maxs = deque()
+
+    def _calculate(self, low, high=None) -> tuple:
+        high = low if high is None else high
+        self._t += 1
+        t, p = self._t, self.period
+
+        if low != low or high != high:
+            self._last_nan = t
+        else:
+            while self._mins and self._mins[-1][1] >= low:
+                self._mins.pop()
+            self._mins.append((t, low))
+            while self._maxs and self._maxs[-1][1] <= high:
+                self._maxs.pop()
+            self._maxs.append((t, high))
+
+        while self._mins and self._mins[0][0] <= t - p:
+            self._mins.popleft()
+        while self._maxs and self._maxs[0][0] <= t - p:
+            self._maxs.popleft()
+
+        if t < p - 1 or t - self._last_nan < p:
+            return np.nan, np.nan
+        return self._mins[0][1], self._maxs[0][1]
+
+
+class ATR(StreamingIndicator):
+    """
+    Streaming average true range (same values as atr)
+
+    >>> a = ATR(14)
+    >>> a.update(high, low, close)
+
+    :param period: smoothing window size
+    :param smoother: smoothing method (registered smoother with streaming implementation)
+    """
+
+    def __init__(self, period=14, smoother='sma', history=100):
+        super().__init__(history)
+        self._sm = _smoother(smoother, period)
+        self._prev_close = None
+
+    def _calculate(self, high, low, close) -> float:
+        tr = abs(high - low)
+        pc = self._prev_close
+        if pc is not None:
+            # maximum of not nan values
+            for v in (abs(high - pc), abs(low - pc)):
+                if v > tr or tr != tr:
+                    tr = v
+        self._prev_close = close
+        return self._sm.update(tr)
+
+
+class _RollingSum:
+    """
+    Rolling sum of fixed window calculated as in pandas (Kahan summation for added and removed values)
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._nobs = 0
+        self._sum = 0.0
+        self._c_add = 0.0
+        self._c_remove = 0.0
+        self._n_same = 0
+        self._prev = np.nan
+
+    def _add(self, v):
+        if v == v:
+            self._nobs += 1
+            y = v - self._c_add
+            t = self._sum + y
+            self._c_add = t - self._sum - y
+            self._sum = t
+            if v == self._prev:
+                self._n_same += 1
+            else:
+                self._n_same = 1
+            self._prev = v
+
+    def _remove(self, v):
+        if v == v:
+            self._nobs -= 1
+            y = -v - self._c_remove
+            t = self._sum + y
+            self._c_remove = t - self._sum - y
+            self._sum = t
+
+    def update(self, v) -> float:
+        self._values.append(v)
+        if self.window == 1 or len(self._values) == 1:
+            # window is recalculated from scratch
+            self._values = deque([v])
+            self._nobs, self._sum, self._c_add, self._c_remove, self._n_same = 0, 0.0, 0.0, 0.0, 0
+            self._prev = v
+            self._add(v)
+        else:
+            if len(self._values) > self.window:
+                self._remove(self._values.popleft())
+            self._add(v)
+
+        if self._nobs >= self.window:
+            return self._prev * self._nobs if self._n_same >= self._nobs else self._sum
+        return np.nan
+
+
+class Bollinger(StreamingIndicator):
+    """
+    Streaming Bollinger Bands (same values as bollinger). Value is (median, upper, lower) tuple.
+
+    :param window: lookback window
+    :param nstd: number of standard devialtions for bands
+    :param mean: method for calculating mean (registered smoother with streaming implementation)
+    """
+
+    def __init__(self, window=14, nstd=2, mean='sma', history=100):
+        super().__init__(history)
+        self.window = window
+        self.nstd = nstd
+        self._mean = _smoother(mean, window)
+        self._sq_sum = _RollingSum(window)
+
+    def _calculate(self, x) -> tuple:
+        m = self._mean.update(x)
+        std = np.sqrt(self._sq_sum.update((x - m) ** 2) / (self.window - 1))
+        return m, m + (std * self.nstd), m - (std * self.nstd)
+
+
+class RSI(StreamingIndicator):
+    """
+    Streaming relative strength index (same values as rsi)
+
+    :param periods: smoothing period
+    :param smoother: smoothing method (registered smoother with streaming implementation)
+    """
+
+    def __init__(self, periods, smoother='sma', history=100):
+        super().__init__(history)
+        self._sm_u = _smoother(smoother, periods)
+        self._sm_d = _smoother(smoother, periods)
+        self._prev = None
+
+    def _calculate(self, x) -> float:
+        # moves are zeros at first value and where difference is nan
+        u = dm = 0.0
+        if self._prev is not None:
+            d = x - self._prev
+            u = d if d > 0 else 0.0
+            dm = -d if d < 0 else 0.0
+        self._prev = x
+
+        mu, md = self._sm_u.update(u), self._sm_d.update(dm)
+        s = mu + md
+        if s == 0:
+            return np.nan if mu == 0 else np.copysign(np.inf, mu)
+        return 100 * mu / s
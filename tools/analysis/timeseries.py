@@ -7,22 +7,14 @@ import statsmodels.api as sm
 from collections import OrderedDict
 
 from statsmodels.regression.linear_model import OLS
-from datetime import timedelta
+from .streaming import HoltWinters, EMA, SMA, WMA, KAMA
 from .tools import (
         column_vector, shift, sink_nans_down,
-        lift_nans_up, nans, rolling_sum, isscalar, apply_to_frame, ohlc_resample
+        lift_nans_up, nans, rolling_sum, isscalar, apply_to_frame, ohlc_resample, retain_columns_and_join,
+        _panel_rows, _over_own_rows, njit, prange
         )
 
 
-try:
-    from numba import njit
-except:
-    print('numba package is not found !')
-
-    def njit(f):
-        return f
-
-
 def __wrap_dataframe_decorator(func):
     def wrapper(*args, **kwargs):
         if isinstance(args[0], (pd.Series, pd.DataFrame)):
@@ -37,48 +29,174 @@ def __empty_smoother(x, *args, **kwargs):
     return column_vector(x)
 
 
-def smooth(x, stype: Union[str, types.FunctionType], *args, **kwargs) -> pd.Series:
+class SmootherInfo:
+    """
+    Registered smoother and its capabilities:
+
+        - batch: func(x, *args, **kwargs) calculates smoothed values for whole series
+        - panel: func handles 2D (time x columns) arrays column-wise
+        - streaming: streaming class (see tools.analysis.streaming) producing same values by one at a time
+        - numba: func is compiled by numba
+    """
+
+    def __init__(self, name, func, panel, streaming, numba):
+        self.name = name
+        self.func = func
+        self.panel = panel
+        self.streaming = streaming
+        self.numba = numba
+
+    @property
+    def batch(self):
+        return self.func is not None
+
+    def __repr__(self):
+        caps = [c for c in ['batch', 'panel', 'numba'] if getattr(self, c)]
+        if self.streaming is not None:
+            caps.append('streaming')
+        return f"SmootherInfo({self.name}: {', '.join(caps)})"
+
+
+_SMOOTHERS = OrderedDict()
+
+
+def register_smoother(name: str, func=None, panel=True, streaming=None, numba=None) -> SmootherInfo:
+    """
+    Register smoother so it can be selected by name in smooth and indicators
+
+    >>> register_smoother('sma3', functools.partial(sma, period=3))
+
+    :param name: smoother's name
+    :param func: batch smoothing function func(x, *args, **kwargs) (any callable)
+    :param panel: true if func handles 2D (time x columns) arrays column-wise
+    :param streaming: streaming class (with update(value) method) producing same values,
+                      if func is not specified smoother is calculated by streaming class
+    :param numba: true if func is compiled by numba (detected for numba dispatchers if not specified)
+    :return: registered smoother info
+    """
+    if func is None and streaming is None:
+        raise ValueError(f"Batch function or streaming class must be specified for smoother '{name}'")
+
+    if func is not None and not callable(func):
+        raise ValueError(f"Smoother '{name}' must be callable")
+
+    if numba is None:
+        numba = func is not None and hasattr(func, 'py_func')
+
+    _SMOOTHERS[name] = SmootherInfo(name, func, panel and func is not None, streaming, numba)
+    return _SMOOTHERS[name]
+
+
+def registered_smoothers() -> dict:
     """
-    Smooth series using either given function or find it by name from registered smoothers
+    All registered smoothers (name -> SmootherInfo)
     """
-    smoothers = {'sma': sma, 'ema': ema, 'tema': tema, 'dema': dema, 'zlema': zlema, 'kama': kama, 'wma': wma}
+    return OrderedDict(_SMOOTHERS)
 
-    f_sm = __empty_smoother
+
+def _smoother_info(stype) -> SmootherInfo:
     if isinstance(stype, str):
-        if stype in smoothers:
-            f_sm = smoothers.get(stype)
-        else:
+        if stype not in _SMOOTHERS:
             raise ValueError("Smoothing method '%s' is not supported !" % stype)
+        return _SMOOTHERS[stype]
 
-    if isinstance(stype, types.FunctionType):
-        f_sm = stype
+    if isinstance(stype, SmootherInfo):
+        return stype
 
-    # smoothing
-    x_sm = f_sm(x, *args, **kwargs)
+    if callable(stype):
+        # registered functions keep their capabilities
+        for i in _SMOOTHERS.values():
+            if i.func is stype:
+                return i
+        return SmootherInfo(getattr(stype, '__name__', repr(stype)), stype, False, None,
+                            hasattr(stype, 'py_func'))
+
+    return SmootherInfo('none', __empty_smoother, True, None, False)
+
+
+def _streaming_smooth(x, streaming, *args, **kwargs):
+    s = streaming(*args, **kwargs)
+    return np.array([s.update(v) for v in x], dtype=np.float64)
 
-    return x_sm if isinstance(x_sm, pd.Series) else pd.Series(x_sm.flatten(), index=x.index)
 
+def _smooth_values(x: np.ndarray, stype, *args, **kwargs) -> np.ndarray:
+    """
+    Smooth 2D array (time x columns) by fastest available implementation of smoother
+    """
+    i = _smoother_info(stype)
+    if i.batch and (i.panel or x.shape[1] == 1):
+        return column_vector(i.func(x, *args, **kwargs))
+
+    if i.batch:
+        return np.column_stack([column_vector(i.func(x[:, j:j + 1], *args, **kwargs)) for j in range(x.shape[1])])
 
-def infer_series_frequency(series):
+    return np.column_stack([_streaming_smooth(x[:, j], i.streaming, *args, **kwargs) for j in range(x.shape[1])])
+
+
+def streaming_smoother(stype, *args, **kwargs):
+    """
+    Create streaming (updated by one value at a time) instance of registered smoother
+
+    >>> s = streaming_smoother('ema', 14)
+    >>> s.update(1.0)
+    """
+    i = _smoother_info(stype)
+    if i.streaming is None:
+        raise ValueError(f"Smoother '{i.name}' doesn't have streaming implementation")
+    return i.streaming(*args, **kwargs)
+
+
+def smooth(x, stype: Union[str, types.FunctionType], *args, **kwargs) -> pd.Series:
+    """
+    Smooth series using either given function or find it by name from registered smoothers.
+    Frame's columns are smoothed at once if smoother supports panels or one by one otherwise.
+    Numba compiled smoothers get input as 2D float array (other functions get input as is).
+    """
+    i = _smoother_info(stype)
+
+    if isinstance(x, pd.DataFrame) and x.shape[1] > 1:
+        return pd.DataFrame(_smooth_values(x.values, i, *args, **kwargs), index=x.index, columns=x.columns)
+
+    if not i.batch or i.numba:
+        x_sm = _smooth_values(column_vector(x).astype(np.float64), i, *args, **kwargs)
+    else:
+        x_sm = i.func(x, *args, **kwargs)
+
+    if isinstance(x_sm, pd.Series):
+        return x_sm
+
+    if isinstance(x, (pd.Series, pd.DataFrame)):
+        return pd.Series(column_vector(x_sm).flatten(), index=x.index)
+
+    return column_vector(x_sm)
+
+
+def infer_series_frequency(series, n_points: int = None):
     """
     Infer frequency of given timeseries
 
+    Frequency is the most frequent difference between neighbouring timestamps (ties are resolved to the smaller one).
+    It works directly on int64 nanoseconds representation of the index so no python objects are created.
+
     :param series: Series, DataFrame or DatetimeIndex object
+    :param n_points: if specified only first n_points and last n_points of the index are examined
     :return: timedelta for found frequency
     """
 
     if not isinstance(series, (pd.DataFrame, pd.Series, pd.DatetimeIndex)):
         raise ValueError("infer_series_frequency> Only DataFrame, Series of DatetimeIndex objects are allowed")
 
-    times_index = (series if isinstance(series, pd.DatetimeIndex) else series.index).to_pydatetime()
+    times_index = (series if isinstance(series, pd.DatetimeIndex) else series.index).asi8
     if times_index.shape[0] < 2:
         raise ValueError("Series must have at least 2 points to determ frequency")
 
-    values = np.array(sorted([(x.total_seconds()) for x in np.diff(times_index)]))
-    diff = np.concatenate(([1], np.diff(values)))
-    idx = np.concatenate((np.where(diff)[0], [len(values)]))
-    freqs = dict(zip(values[idx[:-1]], np.diff(idx)))
-    return timedelta(seconds=max(freqs, key=freqs.get))
+    if n_points is not None and n_points > 1 and times_index.shape[0] > 2 * n_points:
+        deltas = np.concatenate((np.diff(times_index[:n_points]), np.diff(times_index[-n_points:])))
+    else:
+        deltas = np.diff(times_index)
+
+    values, counts = np.unique(deltas, return_counts=True)
+    return pd.Timedelta(int(values[np.argmax(counts)])).to_pytimedelta()
 
 
 def running_view(arr, window, axis=-1):
@@ -205,6 +323,23 @@ def moving_ols(y, x, window):
         return betas, err, sd
 
 
+@njit
+def _holt_winters(x, alpha, beta):
+    n, m = x.shape
+    r_alpha = 1 - alpha
+    r_beta = 1 - beta
+    s = np.zeros((n, m))
+    b = np.zeros((n, m))
+    if n == 0:
+        return s, b
+    s[0, :] = x[0, :]
+    for i in range(1, n):
+        for j in range(m):
+            s[i, j] = alpha * x[i, j] + r_alpha * (s[i - 1, j] + b[i - 1, j])
+            b[i, j] = beta * (s[i, j] - s[i - 1, j]) + r_beta * b[i - 1, j]
+    return s, b
+
+
 def holt_winters_second_order_ewma(x, span, beta) -> tuple:
     """
     The Holt-Winters second order method (aka double exponential smoothing) attempts to incorporate the estimated
@@ -222,16 +357,20 @@ def holt_winters_second_order_ewma(x, span, beta) -> tuple:
         x = x.values
 
     x = np.reshape(x, (x.shape[0], -1))
-    alpha = 2.0 / (1 + span)
-    r_alpha = 1 - alpha
-    r_beta = 1 - beta
-    s = np.zeros(x.shape)
-    b = np.zeros(x.shape)
-    s[0, :] = x[0,:]
-    for i in range(1, x.shape[0]):
-        s[i,:] = alpha * x[i,:] + r_alpha*(s[i-1,:] + b[i-1,:])
-        b[i,:] = beta * (s[i,:] - s[i-1,:]) + r_beta * b[i-1,:]
-    return s, b
+    return _holt_winters(x.astype(np.float64), 2.0 / (1 + span), beta)
+
+
+def holt_winters(x, span, beta=0.1):
+    """
+    Holt-Winters second order smoothing as smoother (see holt_winters_second_order_ewma): only smoothed series
+    is returned. For live updates see tools.analysis.streaming.HoltWinters.
+
+    :param x: series values (DataFrame, Series or numpy array)
+    :param span: number of data points taken for calculation
+    :param beta: trend smoothing factor, 0 < beta < 1
+    :return: smoothed values
+    """
+    return holt_winters_second_order_ewma(x, span, beta)[0]
 
 
 def sma(x, period):
@@ -293,7 +432,10 @@ def _calc_ema(x, span, init_mean=True, min_periods=0):
     alpha = 2.0 / (1 + span)
     x = x.astype(np.float64)
     for i in range(0, x.shape[1]):
-        nan_start = np.where(~np.isnan(x[:, i]))[0][0]
+        valid = np.where(~np.isnan(x[:, i]))[0]
+        if len(valid) == 0:
+            continue
+        nan_start = valid[0]
         x_s = x[:, i][nan_start:]
         a_1 = 1 - alpha
         s = np.zeros(x_s.shape)
@@ -302,7 +444,7 @@ def _calc_ema(x, span, init_mean=True, min_periods=0):
         if init_mean:
             s += np.nan
             if span - 1 >= len(s):
-                x[:,:] = np.nan
+                x[:, i] = np.nan
                 continue
             s[span - 1] = np.mean(x_s[:span])
             start_i = span
@@ -373,6 +515,41 @@ def tema(x, n: int, init_mean=True):
     return 3 * e1 - 3 * e2 + ema(e2, n, init_mean=init_mean)
 
 
+@njit
+def _ema_pass(x, alpha, forward):
+    """
+    EMA (as ema(x, span, init_mean=False)) for every column marching forward or backward (without reversed copies)
+    """
+    n, m = x.shape
+    a_1 = 1 - alpha
+    s = np.full((n, m), np.nan)
+    started = np.zeros(m, dtype=np.bool_)
+    for k in range(n):
+        i = k if forward else n - 1 - k
+        p = i - 1 if forward else i + 1
+        for j in range(m):
+            if not started[j]:
+                if x[i, j] != x[i, j]:
+                    continue
+                s[i, j] = x[i, j]
+                started[j] = True
+                continue
+            s[i, j] = alpha * x[i, j] + a_1 * s[p, j]
+    return s
+
+
+@njit
+def _bidirectional_ema(x, alpha, is_tema):
+    r = np.zeros(x.shape)
+    for forward in (True, False):
+        e1 = _ema_pass(x, alpha, forward)
+        if is_tema:
+            e2 = _ema_pass(e1, alpha, forward)
+            e1 = 3 * e1 - 3 * e2 + _ema_pass(e2, alpha, forward)
+        r = r + e1
+    return r / 2.
+
+
 def bidirectional_ema(x, span, smoother='ema'):
     """
     EMA function is really appropriate for stationary data, i.e., data without trends or seasonality.
@@ -387,13 +564,18 @@ def bidirectional_ema(x, span, smoother='ema'):
     :param smoother: smoothing function (default 'ema' or 'tema')
     :return: smoohted data
     """
-    if smoother == 'tema':
-        fwd = tema(x, span, init_mean=False)        # take TEMA in forward direction
-        bwd = tema(x[::-1], span, init_mean=False)  # take TEMA in backward direction
-    else:
-        fwd = ema(x, span=span, init_mean=False)        # take EMA in forward direction
-        bwd = ema(x[::-1], span=span, init_mean=False)  # take EMA in backward direction
-    return (fwd + bwd[::-1]) / 2.
+    if smoother not in ['ema', 'tema']:
+        raise ValueError("Only 'ema' or 'tema' smoothers are supported")
+
+    x = column_vector(x).astype(np.float64)
+    return _bidirectional_ema(x, 2.0 / (1 + span), smoother == 'tema')
+
+
+def bema(x, span):
+    """
+    Bidirectional EMA smoother (see bidirectional_ema). Note: it uses future values so it's for analysis only.
+    """
+    return bidirectional_ema(x, span, 'ema')
 
 
 def series_halflife(series):
@@ -473,6 +655,30 @@ def bollinger_atr(x, window=14, atr_window=14, natr=2, mean='sma', atr_mean='ema
     return pd.concat(_bb, axis=1, keys=['Median', 'Upper', 'Lower']) if as_frame else _bb
 
 
+def _panel_values(x, column='close'):
+    """
+    Input of panel capable indicators as 2D float array (time x instruments), function wrapping results back
+    into input's type: Series -> Series, DataFrame -> DataFrame, dict of frames -> DataFrame (instruments in columns)
+    and mask of instruments rows (rows where instrument has no data are nans in joined panel).
+    Mask is None if there are no such gaps. Frame's columns are treated as separate series
+    (so nan values are passed into calculations as for series).
+    """
+    rows = None
+    if isinstance(x, dict):
+        data, x = x, retain_columns_and_join(x, column)
+        rows = _panel_rows(data, x.index)
+
+    if isinstance(x, pd.Series):
+        return (x.values.astype(np.float64).reshape(-1, 1),
+                lambda v, name=None: pd.Series(v[:, 0], x.index, name=name), None)
+
+    if isinstance(x, pd.DataFrame):
+        rows = None if rows is None or rows.all() else rows
+        return x.values.astype(np.float64), lambda v, name=None: pd.DataFrame(v, x.index, x.columns), rows
+
+    return column_vector(np.asarray(x)).astype(np.float64), lambda v, name=None: v, None
+
+
 def macd(x, fast=12, slow=26, signal=9, method='ema', signal_method='ema'):
     """
     Moving average convergence divergence (MACD) is a trend-following momentum indicator that shows the relationship
@@ -480,7 +686,7 @@ def macd(x, fast=12, slow=26, signal=9, method='ema', signal_method='ema'):
     12-day fast MA. A nine-day MA of the MACD, called the "signal line", is then plotted on top of the MACD,
     functioning as a trigger for buy and sell signals.
 
-    :param x: input data
+    :param x: input data (series, frame or dict of ohlc frames for panel of instruments)
     :param fast: fast MA period
     :param slow: slow MA period
     :param signal: signal MA period
@@ -488,21 +694,34 @@ def macd(x, fast=12, slow=26, signal=9, method='ema', signal_method='ema'):
     :param signal_method: used method for averaging signal (sma, ema, tema, dema, zlema, kama)
     :return: macd signal
     """
-    x_diff = smooth(x, method, fast) - smooth(x, method, slow)
+    v, _wrap, rows = _panel_values(x)
+
+    def _macd(v):
+        x_diff = _smooth_values(v, method, fast) - _smooth_values(v, method, slow)
 
-    # averaging signal
-    return smooth(x_diff, signal_method, signal).rename('macd')
+        # averaging signal
+        return _smooth_values(x_diff, signal_method, signal),
+
+    return _wrap(_over_own_rows(_macd, rows, v)[0], 'macd')
 
 
 def atr(x, window=14, smoother='sma'):
     """
     Average True Range indicator
 
-    :param x: input series
+    :param x: input series (or dict of ohlc frames for panel of instruments)
     :param window: smoothing window size
     :param smoother: smooting method: sma, ema, zlema, tema, dema, kama
     :return:
     """
+    if isinstance(x, dict):
+        hlc = retain_columns_and_join(x, ['high', 'low', 'close'])
+        v = np.ascontiguousarray(hlc.values.astype(np.float64).reshape(len(hlc), -1, 3).transpose(2, 0, 1))
+        rows = _panel_rows(x, hlc.index)
+        _atr = _over_own_rows(lambda h, l, c: (_smooth_values(_true_range(h, l, c), smoother, window),),
+                              None if rows.all() else rows, v[0], v[1], v[2])[0]
+        return pd.DataFrame(_atr, hlc.index, hlc.columns.get_level_values(0)[0::3])
+
     if not (isinstance(x, pd.DataFrame) and sum(x.columns.isin(['open', 'high', 'low', 'close'])) == 4):
         raise ValueError("Input series must be DataFrame within 'open', 'high', 'low' and 'close' columns defined !")
 
@@ -680,6 +899,66 @@ def rolling_series_slope(x, period, method='ols', scaling='transform', n_bins=5)
     return roll_slope
 
 
+@njit
+def _true_range(h, l, c):
+    """
+    True range for every column (max of not nan values as in atr)
+    """
+    n, m = h.shape
+    r = np.empty((n, m))
+    for j in range(m):
+        r[0, j] = np.abs(h[0, j] - l[0, j])
+
+    for i in range(1, n):
+        for j in range(m):
+            tr = np.nan
+            pc = c[i - 1, j]
+            for v in (np.abs(h[i, j] - l[i, j]), np.abs(h[i, j] - pc), np.abs(l[i, j] - pc)):
+                if v > tr or tr != tr:
+                    tr = v
+            r[i, j] = tr
+    return r
+
+
+@njit
+def _adx_moves(h, l, c):
+    """
+    True range, +DM and -DM for every column in one pass (stacked as [TR | +DM | -DM])
+    """
+    n, m = h.shape
+    r = np.empty((n, 3 * m))
+    r[:, :m] = _true_range(h, l, c)
+    for j in range(m):
+        r[0, m + j] = np.nan
+        r[0, 2 * m + j] = np.nan
+
+    for i in range(1, n):
+        for j in range(m):
+            mu = h[i, j] - h[i - 1, j]
+            md = -(l[i, j] - l[i - 1, j])
+            r[i, m + j] = mu * (1.0 if (mu > 0 and mu > md) else 0.0)
+            r[i, 2 * m + j] = md * (1.0 if (md > 0 and md > mu) else 0.0)
+    return r
+
+
+@njit
+def _rsi_moves(x):
+    """
+    Up and down moves for every column in one pass (stacked as [U | D]).
+    Moves are zeros where difference is nan (first row and around nan values).
+    """
+    n, m = x.shape
+    r = np.zeros((n, 2 * m))
+    for i in range(1, n):
+        for j in range(m):
+            d = x[i, j] - x[i - 1, j]
+            if d > 0:
+                r[i, j] = d
+            elif d < 0:
+                r[i, m + j] = -d
+    return r
+
+
 def adx(ohlc, period, smoother=kama):
     """
     Average Directional Index.
@@ -696,25 +975,38 @@ def adx(ohlc, period, smoother=kama):
     DWNMOVE = L_{t-1} - L_t
     UPMOVE = H_t - H_{t-1}
 
-    :param ohlc: DataFrame with ohlc data
+    :param ohlc: DataFrame with ohlc data or dict of ohlc frames (panel of instruments)
     :param period: indicator period
     :param smoother: smoothing function (kama is default)
-    :return: adx, DIp, DIm
+    :return: adx, DIp, DIm (frames with instruments in columns for panel)
     """
-    if not (isinstance(ohlc, pd.DataFrame) and sum(ohlc.columns.isin(['open', 'high', 'low', 'close'])) == 4):
-        raise ValueError("Input series must be DataFrame within 'open', 'high', 'low' and 'close' columns defined !")
+    if isinstance(ohlc, dict):
+        hlc = retain_columns_and_join(ohlc, ['high', 'low', 'close'])
+        v = np.ascontiguousarray(hlc.values.astype(np.float64).reshape(len(hlc), -1, 3).transpose(2, 0, 1))
+        h, l, c = v[0], v[1], v[2]
+        instruments = hlc.columns.get_level_values(0)[0::3]
+        _wrap = lambda v, name=None: pd.DataFrame(v, hlc.index, instruments)
+        rows = _panel_rows(ohlc, hlc.index)
+        rows = None if rows.all() else rows
+    else:
+        if not (isinstance(ohlc, pd.DataFrame) and sum(ohlc.columns.isin(['open', 'high', 'low', 'close'])) == 4):
+            raise ValueError("Input series must be DataFrame within 'open', 'high', 'low' and 'close' columns defined !")
+        h, _wrap, rows = _panel_values(ohlc['high'])
+        l, c = _panel_values(ohlc['low'])[0], _panel_values(ohlc['close'])[0]
+
+    def _adx(h, l, c):
+        # true range and directional moves are smoothed together
+        m = h.shape[1]
+        s = _smooth_values(_adx_moves(h, l, c), smoother, period)
+        _atr, DMp, DMm = s[:, :m], s[:, m:2 * m], s[:, 2 * m:]
 
-    h, l = ohlc['high'], ohlc['low']
-    _atr = atr(ohlc, period, smoother=smoother)
+        DIp = 100 * DMp / _atr
+        DIm = 100 * DMm / _atr
+        return 100 * _smooth_values(np.abs((DIp - DIm) / (DIp + DIm)), smoother, period), DIp, DIm
 
-    Mu, Md = h.diff(), -l.diff()
-    DMp = Mu * (((Mu > 0) & (Mu > Md)) + 0)
-    DMm = Md * (((Md > 0) & (Md > Mu)) + 0)
-    DIp = 100 * smooth(DMp, smoother, period) / _atr
-    DIm = 100 * smooth(DMm, smoother, period) / _atr
-    _adx = 100 * smooth(abs((DIp - DIm) / (DIp + DIm)), smoother, period)
+    _adx, DIp, DIm = _over_own_rows(_adx, rows, h, l, c)
 
-    return _adx.rename('ADX'), DIp.rename('DIp'), DIm.rename('DIm')
+    return _wrap(_adx, 'ADX'), _wrap(DIp, 'DIp'), _wrap(DIm, 'DIm')
 
 
 def rsi(x, periods, smoother=sma):
@@ -725,56 +1017,42 @@ def rsi(x, periods, smoother=sma):
 
     RSI = 100 * E[U, n] / (E[U, n] + E[D, n])
 
+    :param x: input series, frame (instruments in columns) or dict of ohlc frames (close prices are used)
     """
-    xx = pd.concat((x, x.shift(1)), axis=1, keys=['c', 'p'])
-    df = (xx.c - xx.p)
-    mu = smooth(df.where(df > 0, 0), smoother, periods)
-    md = smooth(abs(df.where(df < 0, 0)), smoother, periods)
+    v, _wrap, rows = _panel_values(x)
 
-    return 100 * mu / (mu + md)
+    def _rsi(v):
+        # up and down moves are smoothed together
+        m = v.shape[1]
+        s = _smooth_values(_rsi_moves(v), smoother, periods)
+        mu, md = s[:, :m], s[:, m:]
+        return 100 * mu / (mu + md),
 
+    return _wrap(_over_own_rows(_rsi, rows, v)[0])
 
-def pivot_point(data, method='classic', timeframe='D', timezone='EET'):
+
+def _pivot_levels(x: pd.DataFrame, method: str):
     """
-    Pivot points indicator based on {daily, weekly or monthy} data
-    it supports 'classic', 'woodie' and 'camarilla' species
+    Pivot levels for resampled ohlc as (names, matrix of levels)
     """
-    if timeframe not in ['D', 'W', 'M']:
-        raise ValueError("Wrong timeframe parameter value, only 'D', 'W' and 'M' allowed")
-        
-    tf_resample = f'1{timeframe}'
-    x = ohlc_resample(data, tf_resample, resample_tz=timezone)
-    
-    pp = pd.DataFrame()
+    o, h, l, c = [x[k].values.astype(np.float64) for k in ['open', 'high', 'low', 'close']]
+    _range = h - l
+
     if method == 'classic':
-        pvt = (x.high + x.low + x.close) / 3
-        _range = x.high - x.low
-
-        pp['R4'] = pvt + 3 * _range
-        pp['R3'] = pvt + 2 * _range
-        pp['R2'] = pvt + _range
-        pp['R1'] = pvt * 2 - x.low
-        pp['P'] = pvt
-        pp['S1'] = pvt * 2 - x.high
-        pp['S2'] = pvt - _range
-        pp['S3'] = pvt - 2 * _range
-        pp['S4'] = pvt - 3 * _range
-
-        # rearrange
-        pp = pp[['R4', 'R3', 'R2', 'R1', 'P', 'S1', 'S2', 'S3', 'S4']]
+        pvt = (h + l + c) / 3
+        levels = {
+            'R4': pvt + 3 * _range, 'R3': pvt + 2 * _range, 'R2': pvt + _range, 'R1': pvt * 2 - l,
+            'P': pvt,
+            'S1': pvt * 2 - h, 'S2': pvt - _range, 'S3': pvt - 2 * _range, 'S4': pvt - 3 * _range,
+        }
 
     elif method == 'woodie':
-        pvt = (x.high + x.low + x.open + x.open) / 4
-        _range = x.high - x.low
-
-        pp['R3'] = x.high + 2 * (pvt - x.low)
-        pp['R2'] = pvt + _range
-        pp['R1'] = pvt * 2 - x.low
-        pp['P'] = pvt
-        pp['S1'] = pvt * 2 - x.high
-        pp['S2'] = pvt - _range
-        pp['S3'] = x.low + 2 * (x.high - pvt)
-        pp = pp[['R3', 'R2', 'R1', 'P', 'S1', 'S2', 'S3']]
+        pvt = (h + l + o + o) / 4
+        levels = {
+            'R3': h + 2 * (pvt - l), 'R2': pvt + _range, 'R1': pvt * 2 - l,
+            'P': pvt,
+            'S1': pvt * 2 - h, 'S2': pvt - _range, 'S3': l + 2 * (h - pvt),
+        }
 
     elif method == 'camarilla':
         """
@@ -788,24 +1066,130 @@ def pivot_point(data, method='classic', timeframe='D', timezone='EET'):
             S3 = C - RANGE * 1.1/4
             S4 = C - RANGE * 1.1/2        
         """
-        pvt = (x.high + x.low + x.close) / 3
-        _range = x.high - x.low
-
-        pp['R4'] = x.close + _range * 1.1 / 2
-        pp['R3'] = x.close + _range * 1.1 / 4
-        pp['R2'] = x.close + _range * 1.1 / 6
-        pp['R1'] = x.close + _range * 1.1 / 12
-        pp['P'] = pvt
-        pp['S1'] = x.close - _range * 1.1 / 12
-        pp['S2'] = x.close - _range * 1.1 / 6
-        pp['S3'] = x.close - _range * 1.1 / 4
-        pp['S4'] = x.close - _range * 1.1 / 2
-        pp = pp[['R4', 'R3', 'R2', 'R1', 'P', 'S1', 'S2', 'S3', 'S4']]
+        pvt = (h + l + c) / 3
+        levels = {
+            'R4': c + _range * 1.1 / 2, 'R3': c + _range * 1.1 / 4, 'R2': c + _range * 1.1 / 6,
+            'R1': c + _range * 1.1 / 12,
+            'P': pvt,
+            'S1': c - _range * 1.1 / 12, 'S2': c - _range * 1.1 / 6, 'S3': c - _range * 1.1 / 4,
+            'S4': c - _range * 1.1 / 2,
+        }
     else:
         raise ValueError("Unknown method %s. Available methods are classic, woodie, camarilla" % method)
 
-    pp.index = pp.index + pd.Timedelta(tf_resample)
-    return data.combine_first(pp).fillna(method='ffill')[pp.columns]
+    return list(levels.keys()), np.column_stack(list(levels.values()))
+
+
+def _periods_ends(labels: pd.DatetimeIndex, timezone) -> pd.DatetimeIndex:
+    """
+    Ends of daily, weekly or monthly periods resampled in timezone (as ohlc_resample does)
+    from their labels. Daily periods are labeled by first day, weekly and monthly ones by last day,
+    so for all of them period ends at the midnight after label's day (in resampling timezone).
+    """
+    if not timezone:
+        return labels.normalize() + pd.DateOffset(days=1)
+
+    local = labels.tz_convert(timezone) if labels.tz is not None else labels.tz_localize('UTC').tz_convert(timezone)
+    ends = local.normalize() + pd.DateOffset(days=1)
+    return ends.tz_convert(labels.tz) if labels.tz is not None else ends.tz_convert('UTC').tz_localize(None)
+
+
+def pivot_point(data, method='classic', timeframe='D', timezone='EET'):
+    """
+    Pivot points indicator based on {daily, weekly or monthy} data
+    it supports 'classic', 'woodie' and 'camarilla' species
+
+    Every bar gets levels of the last period finished before it (bars are mapped to periods by searchsorted).
+
+    :param data: ohlc frame or dict of ohlc frames (panel of symbols)
+    :return: frame with levels on data's index (or dict of frames for dict input)
+    """
+    if timeframe not in ['D', 'W', 'M']:
+        raise ValueError("Wrong timeframe parameter value, only 'D', 'W' and 'M' allowed")
+
+    if method not in ['classic', 'woodie', 'camarilla']:
+        raise ValueError("Unknown method %s. Available methods are classic, woodie, camarilla" % method)
+
+    tf_resample = f'1{timeframe}'
+    xs = ohlc_resample(data, tf_resample, resample_tz=timezone)
+
+    def _pp(d, x):
+        names, levels = _pivot_levels(x, method)
+        # levels are valid since the period is finished
+        pp_times = _periods_ends(x.index, timezone).asi8
+        levels = pd.DataFrame(levels).ffill().values
+
+        ix = np.searchsorted(pp_times, d.index.asi8, side='right') - 1
+        r = levels[np.maximum(ix, 0)]
+        r[ix < 0] = np.nan
+        return pd.DataFrame(r, index=d.index, columns=names)
+
+    if isinstance(data, dict):
+        return {s: _pp(d, xs[s]) for s, d in data.items()}
+
+    return _pp(data, xs)
+
+
+@njit
+def _apply_hourly_offsets(utc, g0, step, offsets):
+    n = len(utc)
+    local = np.empty(n, dtype=np.int64)
+    changed = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        k = (utc[i] - g0) // step
+        local[i] = utc[i] + offsets[k]
+        changed[i] = offsets[k] != offsets[k + 1]
+    return local, changed
+
+
+def _local_time_ns(index: pd.DatetimeIndex, timezone) -> np.ndarray:
+    """
+    Local time (as int64 nanoseconds) in given timezone for index (naive index is considered as UTC).
+    UTC offsets are taken from hourly offsets table covering index range so only timestamps from hours
+    when offset is changed are converted individually.
+    """
+    utc = index.asi8
+    if len(utc) == 0:
+        return utc.copy()
+
+    step = 3600 * 1000000000
+    g0 = (utc.min() // step) * step
+    grid = g0 + step * np.arange((utc.max() - g0) // step + 2, dtype=np.int64)
+    offsets = pd.DatetimeIndex(grid, tz='UTC').tz_convert(timezone).tz_localize(None).asi8 - grid
+
+    local, changed = _apply_hourly_offsets(utc, g0, step, offsets)
+
+    # exact conversion for hours where offset was changed
+    if changed.any():
+        u = utc[changed]
+        local[changed] = pd.DatetimeIndex(u, tz='UTC').tz_convert(timezone).tz_localize(None).asi8
+    return local
+
+
+@njit
+def _intraday_min_max(local_ns, low, high):
+    n = len(local_ns)
+    r_min = np.empty(n)
+    r_max = np.empty(n)
+    day_ns = 86400 * 1000000000
+    day = -1 << 62
+    m_min, m_max = np.nan, np.nan
+    for i in range(n):
+        d = local_ns[i] // day_ns
+        if d != day:
+            # new day started
+            day = d
+            m_min, m_max = low[i], high[i]
+        else:
+            # nan is propagated as np.minimum / np.maximum do
+            lo, hi = low[i], high[i]
+            if lo != lo or lo < m_min:
+                m_min = lo
+            if hi != hi or hi > m_max:
+                m_max = hi
+        r_min[i] = m_min
+        r_max[i] = m_max
+    return r_min, r_max
 
 
 def intraday_min_max(data, timezone='EET'):
@@ -818,29 +1202,87 @@ def intraday_min_max(data, timezone='EET'):
     if not (isinstance(data, pd.DataFrame) and sum(data.columns.isin(['open', 'high', 'low', 'close'])) == 4):
         raise ValueError("Input series must be DataFrame within 'open', 'high', 'low' and 'close' columns defined !")
 
-    def _day_min_max(d):
-        _d_min = np.minimum.accumulate(d.low)
-        _d_max = np.maximum.accumulate(d.high)
-        return pd.concat((_d_min, _d_max), axis=1, keys=['Min', 'Max'])
+    # local time in nanoseconds: days boundaries are just multiples of 24 hours
+    local_ns = _local_time_ns(data.index, timezone)
+    r_min, r_max = _intraday_min_max(
+        local_ns, data['low'].values.astype(np.float64), data['high'].values.astype(np.float64)
+    )
+    return pd.DataFrame({'Min': r_min, 'Max': r_max}, index=data.index)
 
-    source_tz = data.index.tz
-    if not source_tz:
-        x = data.tz_localize('GMT')
-    else:
-        x = data
 
-    x = x.tz_convert(timezone)
-    return x.groupby(x.index.date).apply(_day_min_max).tz_convert(source_tz)
+@njit(parallel=True)
+def _linear_wma(x, period):
+    """
+    Linearly weighted MA (oldest value in window has largest weight as in convolution) by running sums:
+
+        A_t = sum_{j=0..p-1} (j + 1) * x_{t-j},  S_t = sum_{j=0..p-1} x_{t-j}
+        A_{t+1} = A_t + S_t + x_{t+1} - (p + 1) * x_{t-p+1}
+
+    Sums are recalculated directly every period steps (to prevent accumulation of rounding errors)
+    and when window becomes free from nans.
+    """
+    n, m = x.shape
+    y = np.full((n, m), np.nan)
+    norm = period * (period + 1) / 2.0
+    for j in prange(m):
+        last_nan = -1
+        since = 0
+        a, s = 0.0, 0.0
+        for t in range(n):
+            v = x[t, j]
+            if v != v:
+                last_nan = t
+                continue
+            if t - last_nan < period:
+                continue
+
+            if t - last_nan == period or since >= period:
+                # direct calculation
+                a, s = 0.0, 0.0
+                for k in range(period):
+                    xk = x[t - k, j]
+                    a += (k + 1) * xk
+                    s += xk
+                since = 0
+            else:
+                x_out = x[t - period, j]
+                a = a + s + v - (period + 1) * x_out
+                s = s + v - x_out
+                since += 1
+            y[t, j] = a / norm
+    return y
+
+
+def _fft_wma(x, w):
+    """
+    Weighted MA with custom weights (as convolution with w) using FFT for all columns at once.
+    Windows containing nans are nans.
+    """
+    from scipy.signal import fftconvolve
+
+    n, period = x.shape[0], len(w)
+    is_nan = np.isnan(x)
+    y = fftconvolve(np.where(is_nan, 0.0, x), w.reshape(-1, 1), mode='full', axes=0)[:n]
+
+    # number of nans in every window
+    n_nans = np.cumsum(is_nan, axis=0)
+    n_nans[period:] -= n_nans[:-period].copy()
+    y[(n_nans > 0) | (np.arange(n) < period - 1)[:, np.newaxis]] = np.nan
+    return y
 
 
 def wma(x, period, weights=None):
     """
     Weighted MA
+
+    Linear weights are calculated by O(n) running sums recurrence (in parallel over columns),
+    custom weights are applied by FFT convolution.
     """
     x = column_vector(x)
         
     # if weights are set up
-    if weights is None or not weights: 
+    is_linear = weights is None or not weights
+    if is_linear:
         w = np.arange(1, period + 1)
     else:
         w = np.array(weights)  
@@ -848,12 +1290,21 @@ def wma(x, period, weights=None):
         
     if period > len(x):
         raise ValueError(f"Period for wma must be less than number of rows. {period}, {len(x)}")
-        
-    w = w / np.sum(w)
-    y = x.astype(np.float64).copy()
-    for i in range(0, x.shape[1]):
-        nan_start = np.where(~np.isnan(x[:, i]))[0][0]
-        y_s = y[:, i][nan_start:]
-        wm = np.concatenate((nans(period - 1), np.convolve(y_s, w, 'valid')))
-        y[:, i] = np.concatenate((nans(nan_start), wm))
-    return y
\ No newline at end of file
+
+    x = x.astype(np.float64)
+    if is_linear:
+        return _linear_wma(x, period)
+
+    return _fft_wma(x, w / np.sum(w))
+
+
+# - - - - registered smoothers - - - -
+register_smoother('sma', sma, streaming=SMA)
+register_smoother('ema', ema, streaming=EMA)
+register_smoother('tema', tema)
+register_smoother('dema', dema)
+register_smoother('zlema', zlema)
+register_smoother('kama', kama, streaming=KAMA)
+register_smoother('wma', wma, streaming=WMA)
+register_smoother('hw', holt_winters, streaming=HoltWinters)
+register_smoother('bema', bema)
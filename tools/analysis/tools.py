@@ -3,9 +3,17 @@ from typing import Union
 
 import numpy as np
 import pandas as pd
-from numba import njit
 from numpy.lib.stride_tricks import as_strided as stride
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # - plain python fallback: supports both @njit and @njit(...) forms
+    def njit(f=None, **kwargs):
+        return f if f is not None else (lambda g: g)
+
+    prange = range
+
 
 def column_vector(x):
     """
@@ -371,6 +379,44 @@ def drop_duplicated_indexes(df, keep='first'):
     return df[~df.index.duplicated(keep=keep)]
 
 
+def _scols_same_index(xs, keys):
+    """
+    Fast path for scols: all series (or all frames) share identical index, so there is nothing to align.
+    Returns None if fast path can't be applied.
+    """
+    if len(xs) < 2:
+        return None
+
+    idx = xs[0].index
+    if not all(x.index is idx or x.index.equals(idx) for x in xs[1:]):
+        return None
+
+    if keys is not None and len(keys) != len(xs):
+        return None
+
+    if all(isinstance(x, pd.Series) for x in xs):
+        labels = list(keys) if keys is not None else [x.name for x in xs]
+        vals = [x.values for x in xs]
+    elif all(isinstance(x, pd.DataFrame) for x in xs) and not any(isinstance(x.columns, pd.MultiIndex) for x in xs):
+        if keys is not None:
+            labels = [(k, c) for k, x in zip(keys, xs) for c in x.columns]
+        else:
+            labels = [c for x in xs for c in x.columns]
+        vals = [x.iloc[:, i].values for x in xs for i in range(x.shape[1])]
+    else:
+        return None
+
+    if any(l is None for l in labels) or len(set(labels)) != len(labels):
+        return None
+
+    columns = pd.MultiIndex.from_tuples(labels) if labels and isinstance(labels[0], tuple) else pd.Index(labels)
+    dtypes = set(v.dtype for v in vals)
+    if len(dtypes) == 1 and next(iter(dtypes)).kind in 'biuf':
+        # single block frame
+        return pd.DataFrame(np.column_stack(vals), index=idx, columns=columns, copy=False)
+    return pd.DataFrame(dict(zip(range(len(vals)), vals)), index=idx).set_axis(columns, axis=1)
+
+
 def scols(*xs, keys=None, names=None, keep='all'):
     """
     Concat dataframes/series from xs into single dataframe by axis 1
@@ -387,7 +433,9 @@ def scols(*xs, keys=None, names=None, keep='all'):
             pd.DataFrame([11,21,31,14], list('WERT')), 
             names=['x', 'y', 'z', 'w'])
     """
-    r = pd.concat((xs), axis=1, keys=keys)
+    r = _scols_same_index(xs, keys)
+    if r is None:
+        r = pd.concat((xs), axis=1, keys=keys)
     if names:
         if isinstance(names, (list, tuple)):
             if len(names) == len(r.columns):
@@ -399,12 +447,66 @@ def scols(*xs, keys=None, names=None, keep='all'):
     return r
 
 
+@njit
+def _merge_sorted_pair(ka: np.ndarray, pa: np.ndarray, kb: np.ndarray, pb: np.ndarray):
+    """
+    Merge two sorted keys arrays (with their positions), a's elements go first for equal keys
+    """
+    n_a, n_b = len(ka), len(kb)
+    k = np.empty(n_a + n_b, dtype=ka.dtype)
+    p = np.empty(n_a + n_b, dtype=np.int64)
+    i, j = 0, 0
+    for m in range(n_a + n_b):
+        if j >= n_b or (i < n_a and ka[i] <= kb[j]):
+            k[m], p[m] = ka[i], pa[i]
+            i += 1
+        else:
+            k[m], p[m] = kb[j], pb[j]
+            j += 1
+    return k, p
+
+
+def _merge_sorted(xs, keep='all'):
+    """
+    Merge individually sorted series/frames keeping order of inputs for equal indexes
+    and dropping duplicated indexes during merge (keep = 'first' / 'last' / 'all').
+    Inputs are merged pairwise (neighbours first) so it takes O(N log k) for k inputs of N rows in total.
+    Returns None if inputs can't be merged this way.
+    """
+    if not xs or not all(
+            isinstance(x, (pd.Series, pd.DataFrame)) and not isinstance(x.index, pd.MultiIndex)
+            and x.index.is_monotonic_increasing for x in xs):
+        return None
+
+    r = pd.concat(xs, axis=0)
+    keys = r.index.asi8 if isinstance(r.index, pd.DatetimeIndex) else r.index.values
+    if keys.dtype.kind not in 'iuf':
+        return None
+
+    bounds = np.cumsum([0] + [len(x) for x in xs])
+    runs = [(keys[s:e], np.arange(s, e)) for s, e in zip(bounds[:-1], bounds[1:])]
+    while len(runs) > 1:
+        merged = [_merge_sorted_pair(*runs[i], *runs[i + 1]) for i in range(0, len(runs) - 1, 2)]
+        runs = merged + runs[-1:] if len(runs) % 2 else merged
+    k, order = runs[0]
+
+    if keep != 'all' and len(order) > 1:
+        if keep == 'first':
+            mask = np.concatenate(([True], k[1:] != k[:-1]))
+        else:
+            mask = np.concatenate((k[1:] != k[:-1], [True]))
+        order = order[mask]
+
+    return r.take(order)
+
+
 def srows(*xs, keep='all', sort=True):
     """
     Concat dataframes/series from xs into single dataframe by axis 0
     :param sort: if true it sorts resulting dataframe by index (default)
     :param keep: how to deal with duplicated indexes. 
                  If set to 'all' it doesn't do anything (default). Otherwise keeps first or last occurences
+                 (in order of xs)
     :return: combined dataframe
     
     Example
@@ -416,14 +518,106 @@ def srows(*xs, keep='all', sort=True):
             pd.DataFrame([11,21,31,14], list('WERT')), 
             sort=True, keep='last')
     """
+    if sort:
+        r = _merge_sorted(xs, keep)
+        if r is not None:
+            return r
+
     r = pd.concat((xs), axis=0)
-    r = r.sort_index() if sort else r
+    r = r.sort_index(kind='stable') if sort else r
     if keep != 'all':
         r = drop_duplicated_indexes(r, keep=keep)
     return r
 
 
-def retain_columns_and_join(data: dict, columns):
+@njit
+def _union_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Union of two sorted arrays by merging (duplicates within arrays are collapsed)
+    """
+    r = np.empty(len(a) + len(b), dtype=a.dtype)
+    i, j, k = 0, 0, 0
+    while i < len(a) or j < len(b):
+        if j >= len(b) or (i < len(a) and a[i] < b[j]):
+            v = a[i]
+            i += 1
+        elif i >= len(a) or b[j] < a[i]:
+            v = b[j]
+            j += 1
+        else:
+            v = a[i]
+            i += 1
+            j += 1
+        if k == 0 or r[k - 1] != v:
+            r[k] = v
+            k += 1
+    return r[:k]
+
+
+@njit
+def _intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Intersection of two sorted arrays by merging
+    """
+    r = np.empty(min(len(a), len(b)), dtype=a.dtype)
+    i, j, k = 0, 0, 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif b[j] < a[i]:
+            j += 1
+        else:
+            if k == 0 or r[k - 1] != a[i]:
+                r[k] = a[i]
+                k += 1
+            i += 1
+            j += 1
+    return r[:k]
+
+
+@njit
+def _sorted_positions(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Positions of b's elements in a (both are sorted) or -1 if element is not found
+    """
+    r = np.full(len(b), -1, dtype=np.int64)
+    i = 0
+    for j in range(len(b)):
+        while i < len(a) and a[i] < b[j]:
+            i += 1
+        if i < len(a) and a[i] == b[j]:
+            r[j] = i
+    return r
+
+
+def _join_indexes(indexes: list, join: str) -> pd.Index:
+    """
+    Union (outer) or intersection (inner) of indexes
+    """
+    i0 = indexes[0]
+    if all(i.equals(i0) for i in indexes[1:]):
+        return i0
+
+    is_dt = all(isinstance(i, pd.DatetimeIndex) and i.tz == i0.tz for i in indexes)
+    is_int = all(i.dtype.kind in 'iu' and i.dtype == i0.dtype for i in indexes)
+    if not (is_dt or is_int) or not all(i.is_monotonic_increasing for i in indexes):
+        r = i0
+        for i in indexes[1:]:
+            r = r.union(i) if join == 'outer' else r.intersection(i)
+        return r
+
+    _merge = _union_sorted if join == 'outer' else _intersect_sorted
+    vals = indexes[0].asi8 if is_dt else indexes[0].values
+    for i in indexes[1:]:
+        vals = _merge(vals, i.asi8 if is_dt else i.values)
+
+    if is_dt:
+        r = pd.DatetimeIndex(vals, name=i0.name)
+        return r.tz_localize('UTC').tz_convert(i0.tz) if i0.tz is not None else r
+    return pd.Index(vals, name=i0.name)
+
+
+def retain_columns_and_join(data: dict, columns, join='outer'):
     """
     Retains given columns from every value of data dictionary and concatenate them into single data frame    
 
@@ -436,11 +630,116 @@ def retain_columns_and_join(data: dict, columns):
     closes = retain_columns_and_join(data, 'close')
     hi_lo = retain_columns_and_join(data, ['high', 'low'])
 
+    Indexes are joined once (by merging for sorted datetime / integer indexes). If all retained columns
+    have the same numeric dtype values are copied directly into single preallocated array which backs resulting frame,
+    otherwise frame is built column by column and every column keeps its dtype.
+
     :param data: dictionary with dataframes  
     :param columns: columns names need to be retained 
+    :param join: how to join indexes: 'outer' (union) or 'inner' (intersection)
     :return: data frame 
     """
     if not isinstance(data, dict):
         raise ValueError('Data must be passed as dictionary')
 
-    return pd.concat([data[k][columns] for k in data.keys()], axis=1, keys=data.keys())
+    if join not in ['outer', 'inner']:
+        raise ValueError("join must be 'outer' or 'inner'")
+
+    keys = list(data.keys())
+    if not keys or not all(data[k].index.is_unique for k in keys):
+        # indexes with duplicated labels can't be merged: it's up to pandas
+        return pd.concat([data[k][columns] for k in keys], axis=1, keys=keys, join=join)
+
+    is_single = isscalar(columns)
+    c_list = [columns] if is_single else list(columns)
+    index = _join_indexes([data[k].index for k in keys], join)
+    n_cols = len(c_list)
+
+    dtypes = set(data[k][c].dtype for k in keys for c in c_list)
+    dtype = next(iter(dtypes))
+    is_full = all(len(data[k].index) == len(index) and data[k].index.equals(index) for k in keys)
+
+    # single array is used only when every column has the same numeric dtype which can hold nans
+    is_block = len(dtypes) == 1 and (dtype.kind == 'f' or (is_full and dtype.kind in 'biu'))
+    if is_block:
+        # column-major layout: every column is contiguous and it's native layout for pandas block
+        r = np.empty((len(index), len(keys) * n_cols), dtype=dtype, order='F')
+        if not is_full:
+            r.fill(np.nan)
+    else:
+        r = {}
+
+    is_sorted = isinstance(index, pd.DatetimeIndex) and index.is_monotonic_increasing
+    for j, k in enumerate(keys):
+        d = data[k]
+        if d.index.equals(index):
+            rows = slice(None)
+        else:
+            if is_sorted and isinstance(d.index, pd.DatetimeIndex) and d.index.is_monotonic_increasing:
+                rows = _sorted_positions(index.asi8, d.index.asi8)
+            else:
+                rows = index.get_indexer(d.index)
+            found = rows >= 0
+            if not found.all():
+                d, rows = d[found], rows[found]
+
+        if is_block:
+            for i, c in enumerate(c_list):
+                r[rows, j * n_cols + i] = d[c].values
+        else:
+            # every column keeps its own dtype (promoted by pandas rules when there are missing rows)
+            if not isinstance(rows, slice):
+                src = np.full(len(index), -1, dtype=np.int64)
+                src[rows] = np.arange(len(rows))
+            for i, c in enumerate(c_list):
+                v = d[c].values
+                r[j * n_cols + i] = v if isinstance(rows, slice) else pd.api.extensions.take(v, src, allow_fill=True)
+
+    cols = pd.Index(keys) if is_single else pd.MultiIndex.from_product([keys, c_list])
+    if is_block:
+        return pd.DataFrame(r, index=index, columns=cols, copy=False)
+    return pd.DataFrame(r, index=index).set_axis(cols, axis=1)
+
+
+def _panel_rows(data: dict, index: pd.Index):
+    """
+    Mask (time x instruments) of joined index rows where every instrument from data dict has bars
+    """
+    return np.column_stack([index.isin(data[k].index) for k in data.keys()])
+
+
+def _over_own_rows(f, rows, *arrays) -> tuple:
+    """
+    Calculate f(*arrays) over 2D arrays (time x instruments) so every instrument is processed over its own rows only
+    (results are the same as for separate series). Function must return tuple of 2D arrays (time x instruments),
+    results are nans in rows where instrument has no data.
+
+    :param f: function calculating indicator
+    :param rows: mask of instruments rows (or None if all rows are present)
+    :param arrays: input arrays
+    """
+    if rows is None:
+        return f(*arrays)
+
+    n, m = rows.shape
+    full = rows.all(axis=0)
+    outs = None
+
+    # instruments without gaps are calculated together
+    if full.any():
+        res = f(*[a[:, full] for a in arrays])
+        outs = [np.full((n, m), np.nan, dtype=r.dtype) for r in res]
+        for o, r in zip(outs, res):
+            o[:, full] = r
+
+    for j in np.where(~full)[0]:
+        rj = rows[:, j]
+        if not rj.any():
+            continue
+        res = f(*[a[rj, j:j + 1] for a in arrays])
+        if outs is None:
+            outs = [np.full((n, m), np.nan, dtype=r.dtype) for r in res]
+        for o, r in zip(outs, res):
+            o[rj, j] = r[:, 0]
+
+    return tuple(outs) if outs is not None else f(*arrays)
@@ -1,11 +1,17 @@
 import numpy as np
 import pandas as pd
 from glob import glob
-from os.path import split, join
+from os.path import split, join, abspath
 from tqdm.notebook import tqdm
 import pytz, time, datetime
 import sqlite3
-from dataclasses import dataclass
+import threading
+import tempfile
+import shutil
+import os
+import re
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict
 
 from tools.utils.utils import mstruct, green, red, yellow, time_delta_to_str
@@ -13,30 +19,207 @@ from tools.analysis.timeseries import infer_series_frequency
 from tools.analysis.tools import ohlc_resample
 
 
-@dataclass
-class TickData:
-    instrument: str
-    symbol: str
-    exchange: str
-    data: pd.DataFrame
-        
+class _BarsAccessor:
+    """
+    Common accessors for ticks containers. Resampled bars are memoized per (timeframe, tz)
+    and cache is invalidated when new ticks are appended.
+    """
+
+    def tick(self) -> pd.DataFrame:
+        raise NotImplementedError()
+
+    def bars(self, timeframe, tz=None) -> pd.DataFrame:
+        """
+        Ticks resampled to OHLC bars (cached per timeframe and timezone).
+        Returned frame is shared between calls so it shouldn't be modified inplace.
+        """
+        if self._bars is None:
+            self._bars = {}
+        key = (timeframe, tz)
+        if key not in self._bars:
+            self._bars[key] = ohlc_resample(self.tick(), timeframe, resample_tz=tz)
+        return self._bars[key]
+
+    def invalidate(self):
+        self._bars = None
+
     def ohlc(self, timeframe, tz=None):
-        return ohlc_resample(self.data, timeframe, resample_tz=tz)
-    
+        return self.bars(timeframe, tz)
+
     def ohlcs(self, timeframe, tz=None):
-        return {self.symbol: ohlc_resample(self.data, timeframe, resample_tz=tz)}
-    
+        return {self.symbol: self.bars(timeframe, tz)}
+
     def datas(self, what, **kwargs):
-        return self.ticks() if what == 'ticks' else self.ohlcs(what, **kwargs) 
-    
+        return self.ticks() if what == 'ticks' else self.ohlcs(what, **kwargs)
+
     def data(self, what, **kwargs):
-        return self.tick() if what == 'ticks' else self.ohlc(what, **kwargs) 
-    
+        return self.tick() if what == 'ticks' else self.ohlc(what, **kwargs)
+
     def ticks(self):
-        return {self.symbol: self.data} 
-    
+        return {self.symbol: self.tick()}
+
+
+@dataclass
+class TickData(_BarsAccessor):
+    """
+    Instrument's ticks (or bars). Raw data is accessible as raw attribute (or by tick() method),
+    resampled data is returned by bars/ohlc/data methods.
+    """
+    instrument: str
+    symbol: str
+    exchange: str
+    raw: pd.DataFrame
+    _bars: dict = field(default=None, init=False, repr=False, compare=False)
+
+    def tick(self):
+        return self.raw
+
+    def append(self, data: pd.DataFrame):
+        """
+        Append new ticks (only ones after last stored time)
+        """
+        if len(self.raw) > 0:
+            data = data[data.index > self.raw.index[-1]]
+        if len(data) > 0:
+            self.raw = pd.concat((self.raw, data), axis=0)
+            self.invalidate()
+        return self
+
+    def compact(self, tick_size=None):
+        """
+        Compact (columnar) representation of this data (see CompactTickData)
+        """
+        return CompactTickData.from_frame(self.instrument, self.symbol, self.exchange, self.raw, tick_size)
+
+
+class CompactTickData(_BarsAccessor):
+    """
+    Memory efficient columnar variant of TickData.
+
+    Timestamps are kept as int64 epoch nanoseconds, prices as float32 (or as int ticks
+    when tick_size is specified) and volumes / sizes as integers. Pandas frame is built only on demand,
+    API is the same as for TickData.
+
+    >>> cd = load_instrument_data('dukas:EURUSD', dbtype='sql').compact(tick_size=0.00001)
+    >>> cd.ohlc('1h')
+    """
+
+    def __init__(self, instrument: str, symbol: str, exchange: str, times: np.ndarray, columns: Dict[str, np.ndarray],
+                 tz=None, scale: int = None):
+        self.instrument = instrument
+        self.symbol = symbol
+        self.exchange = exchange
+        self.times = times
+        self.columns = columns
+        self.tz = tz
+        self.scale = scale
+        self._bars = None
+
+    @staticmethod
+    def _is_volume(name: str) -> bool:
+        name = str(name).lower()
+        return 'vol' in name or 'size' in name
+
+    @staticmethod
+    def _smallest_int(v: np.ndarray) -> np.ndarray:
+        v_min, v_max = (v.min(), v.max()) if len(v) > 0 else (0, 0)
+        for t in [np.int16, np.int32]:
+            if v_min >= np.iinfo(t).min and v_max <= np.iinfo(t).max:
+                return v.astype(t)
+        return v.astype(np.int64)
+
+    @staticmethod
+    def from_frame(instrument: str, symbol: str, exchange: str, data: pd.DataFrame, tick_size=None):
+        """
+        Create compact data from frame
+
+        :param tick_size: if specified prices are stored as integer number of ticks
+        """
+        scale = int(round(1 / tick_size)) if tick_size else None
+        columns = {}
+        for c in data.columns:
+            v = data[c].values
+            if not pd.api.types.is_numeric_dtype(v.dtype):
+                columns[c] = v
+            elif CompactTickData._is_volume(c):
+                # volumes are stored as integers if they don't have fractional parts
+                if np.isfinite(v).all() and (np.mod(v, 1) == 0).all():
+                    v = CompactTickData._smallest_int(v)
+                columns[c] = v
+            elif scale is not None and np.isfinite(v).all():
+                columns[c] = CompactTickData._smallest_int(np.round(v * scale))
+            else:
+                columns[c] = v.astype(np.float32)
+
+        return CompactTickData(instrument, symbol, exchange, data.index.asi8.copy(), columns, data.index.tz, scale)
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + sum([v.nbytes for v in self.columns.values()])
+
+    def __len__(self):
+        return len(self.times)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Convert to pandas frame (volumes are restored as integers and prices as float64)
+        """
+        data = {}
+        for c, v in self.columns.items():
+            if v.dtype == np.float32:
+                v = v.astype(np.float64)
+            elif self.scale is not None and not self._is_volume(c) and pd.api.types.is_integer_dtype(v.dtype):
+                v = v / self.scale
+            elif pd.api.types.is_integer_dtype(v.dtype):
+                v = v.astype(np.int64)
+            data[c] = v
+
+        index = pd.DatetimeIndex(self.times, name='time')
+        index = index.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else index
+        return pd.DataFrame(data, index=index, columns=list(self.columns.keys()))
+
     def tick(self):
-        return self.data 
+        return self.frame()
+
+    def _append_column(self, name, stored: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """
+        Append values to stored column keeping column's representation
+        """
+        if not pd.api.types.is_numeric_dtype(stored.dtype) or not pd.api.types.is_numeric_dtype(v.dtype):
+            return np.concatenate((stored, v))
+
+        if pd.api.types.is_integer_dtype(stored.dtype):
+            if self._is_volume(name):
+                if np.isfinite(v).all() and (np.mod(v, 1) == 0).all():
+                    return np.concatenate((stored, self._smallest_int(v)))
+                return np.concatenate((stored.astype(np.float64), v.astype(np.float64)))
+
+            if np.isfinite(v).all():
+                return np.concatenate((stored, self._smallest_int(np.round(v * self.scale))))
+
+            # nans can't be stored as ticks so column is converted to float prices
+            return np.concatenate(((stored / self.scale).astype(np.float32), v.astype(np.float32)))
+
+        return np.concatenate((stored, v.astype(stored.dtype)))
+
+    def append(self, data: pd.DataFrame):
+        """
+        Append new ticks (only ones after last stored time)
+        """
+        if set(data.columns) != set(self.columns.keys()):
+            raise ValueError(f"Appended data columns {list(data.columns)} don't match "
+                             f"stored columns {list(self.columns.keys())}")
+
+        if len(self.times) > 0:
+            data = data[data.index.asi8 > self.times[-1]]
+        if len(data) > 0:
+            self.times = np.concatenate((self.times, data.index.asi8))
+            self.columns = {c: self._append_column(c, v, data[c].values) for c, v in self.columns.items()}
+            self.invalidate()
+        return self
+
+    def __repr__(self):
+        return f'CompactTickData({self.instrument}, {len(self)} rows, {self.nbytes / 1024 ** 2:.1f} Mb)'
     
     
 class MultiTickData:
@@ -45,6 +228,12 @@ class MultiTickData:
     
     def ohlc(self, timeframe, **kwargs):
         return {s: v.ohlc(timeframe, **kwargs) for s, v in self.tickdata.items()}
+
+    def ohlcs(self, timeframe, **kwargs):
+        return self.ohlc(timeframe, **kwargs)
+
+    def datas(self, what, **kwargs):
+        return self.ticks() if what == 'ticks' else self.ohlcs(what, **kwargs)
     
     def __getitem__(self, idx):
         if isinstance(idx, (tuple, list)):
@@ -67,7 +256,7 @@ def __get_hdf_database_path(vendor, timeframe, path='./'):
 
 
 def update_database_hdf(vendor, symbol, data, path='../data/'):
-    timeframe = time_delta_to_str(pd.Timedelta(infer_series_frequency(data[:200])))
+    timeframe = time_delta_to_str(pd.Timedelta(infer_series_frequency(data, n_points=100)))
     tD = pd.Timedelta(timeframe)
     db_path = __get_hdf_database_path(vendor, timeframe, path)
     
@@ -87,25 +276,267 @@ def update_database_hdf(vendor, symbol, data, path='../data/'):
             print(yellow('[NOTHING TO APPEND]'))
     
 
+class SqliteStorage:
+    """
+    Access layer for sqlite3 OHLC/ticks databases.
+
+    Every symbol is stored in separate table with integer epoch (nanoseconds, UTC) time primary key,
+    so range queries and min/max(time) are index driven. Connections are pooled per database file (and thread),
+    all values are passed as query parameters and tables names are validated before use.
+
+    >>> db = SqliteStorage('../data/amp_1MIN.db')
+    >>> db.write('SPXM', data)
+    >>> db.load_many(['SPXM', 'AUS200'], '2020-01-01', '2020-06-01')
+    """
+    __POOL = {}
+    __POOL_LOCK = threading.Lock()
+    __IDENTIFIER = re.compile(r'^[A-Za-z0-9_][A-Za-z0-9_.\-]*$')
+
+    def __init__(self, db_path):
+        self.db_path = abspath(db_path)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        key = (self.db_path, threading.get_ident())
+        with SqliteStorage.__POOL_LOCK:
+            db = SqliteStorage.__POOL.get(key)
+            if db is None:
+                db = sqlite3.connect(self.db_path)
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute('PRAGMA synchronous=NORMAL')
+                SqliteStorage.__POOL[key] = db
+        return db
+
+    @staticmethod
+    def close_all():
+        """
+        Close all pooled connections
+        """
+        with SqliteStorage.__POOL_LOCK:
+            for db in SqliteStorage.__POOL.values():
+                db.close()
+            SqliteStorage.__POOL.clear()
+
+    def _identifier(self, name: str) -> str:
+        if not isinstance(name, str) or not SqliteStorage.__IDENTIFIER.match(name):
+            raise ValueError(f"Wrong table name '{name}'")
+        return f'"{name}"'
+
+    def tables(self) -> list:
+        return [t[0] for t in self.db.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()]
+
+    def exists(self, table) -> bool:
+        return self.db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+    def columns(self, table) -> dict:
+        """
+        Table's columns (except time) and their declared types
+        """
+        return {c[1]: c[2].upper() for c in self.db.execute(f'PRAGMA table_info({self._identifier(table)})').fetchall()
+                if c[1] != 'time'}
+
+    def is_epoch_table(self, table) -> bool:
+        """
+        True if table has integer epoch (nanoseconds) time primary key.
+        Tables created by old versions (via DataFrame.to_sql) keep time as text.
+        """
+        for _, name, ctype, _, _, pk in self.db.execute(f'PRAGMA table_info({self._identifier(table)})').fetchall():
+            if name == 'time':
+                return ctype.upper() == 'INTEGER' and pk > 0
+        return False
+
+    def time_range(self, table) -> tuple:
+        start, end = self.db.execute(f'SELECT min(time), max(time) FROM {self._identifier(table)}').fetchone()
+        if self.is_epoch_table(table):
+            return (pd.Timestamp(start) if start is not None else None), (pd.Timestamp(end) if end is not None else None)
+        return start, end
+
+    @staticmethod
+    def _sql_type(dtype):
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(dtype):
+            return 'REAL'
+        return 'TEXT'
+
+    @staticmethod
+    def _utc_naive_index(data):
+        return data.tz_convert('UTC').tz_localize(None) if data.index.tz is not None else data
+
+    def _create_table(self, table, data):
+        cols = ''.join([f', {self._identifier(c)} {self._sql_type(t)}' for c, t in data.dtypes.items()])
+        self.db.execute(f'CREATE TABLE IF NOT EXISTS {self._identifier(table)} (time INTEGER PRIMARY KEY{cols})')
+
+    def _insert_rows(self, table, data, batch_size=100000):
+        columns = ''.join([f', {self._identifier(c)}' for c in data.columns])
+        placeholders = ', ?' * len(data.columns)
+        sql = f'INSERT OR REPLACE INTO {self._identifier(table)} (time{columns}) VALUES (?{placeholders})'
+        times = data.index.asi8
+        for i in range(0, len(data), batch_size):
+            chunk = data.iloc[i:i + batch_size]
+            self.db.executemany(sql, zip(times[i:i + batch_size].tolist(), *[chunk[c].tolist() for c in chunk.columns]))
+
+    def _bulk_insert(self, table, data, batch_size=100000):
+        """
+        Insert data into table in single transaction using batched executemany
+        """
+        with self.db:
+            self._insert_rows(table, data, batch_size)
+
+    def _migrate_table(self, table):
+        """
+        Convert table with text time column (created by DataFrame.to_sql) into epoch indexed table.
+        Migration runs in single transaction so table is left untouched if it fails.
+        """
+        data = self._load_legacy(table, None, None)
+        db = self.db
+
+        # explicit transaction: otherwise sqlite3 module commits DDL statements immediately
+        db.execute('BEGIN')
+        try:
+            db.execute(f'ALTER TABLE {self._identifier(table)} RENAME TO {self._identifier(table + "__legacy")}')
+            self._create_table(table, data)
+            self._insert_rows(table, data)
+            db.execute(f'DROP TABLE {self._identifier(table + "__legacy")}')
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+
+    def write(self, table, data, start=None) -> int:
+        """
+        Append data (starting from start if specified) to table
+
+        :return: number of written rows
+        """
+        data = self._utc_naive_index(data)
+        if self.exists(table):
+            if not self.is_epoch_table(table):
+                self._migrate_table(table)
+        else:
+            self._create_table(table, data)
+
+        data_to_insert = data[pd.Timestamp(start):] if start is not None else data
+        if len(data_to_insert) > 0:
+            self._bulk_insert(table, data_to_insert)
+        return len(data_to_insert)
+
+    def _load_legacy(self, table, start='2000-01-01', end='2200-01-01'):
+        """
+        Load data from table with text time column (whole table if start and end are None)
+        """
+        if start is None and end is None:
+            data = pd.read_sql_query(f'SELECT * FROM {self._identifier(table)}', self.db, index_col='time')
+        else:
+            data = pd.read_sql_query(
+                f'SELECT * FROM {self._identifier(table)} WHERE time >= ? AND time <= ?', self.db, index_col='time',
+                params=(str(start), str(end))
+            )
+        data.index = pd.DatetimeIndex(data.index)
+        return data
+
+    def load(self, table, start='2000-01-01', end='2200-01-01') -> pd.DataFrame:
+        """
+        Load data in [start, end] range from table
+        """
+        if not self.exists(table):
+            raise ValueError(f"Can't find '{table}' in {self.db_path}")
+
+        if not self.is_epoch_table(table):
+            return self._load_legacy(table, start, end).rename_axis('time')
+
+        data = pd.read_sql_query(
+            f'SELECT * FROM {self._identifier(table)} WHERE time >= ? AND time <= ? ORDER BY time', self.db,
+            index_col='time', params=(pd.Timestamp(start).value, pd.Timestamp(end).value)
+        )
+        data.index = pd.to_datetime(data.index, unit='ns').rename('time')
+        return data
+
+    def load_many(self, tables, start='2000-01-01', end='2200-01-01') -> Dict[str, pd.DataFrame]:
+        """
+        Load data in [start, end] range for multiple tables by single query
+        """
+        for t in tables:
+            if not self.exists(t):
+                raise ValueError(f"Can't find '{t}' in {self.db_path}")
+
+        epochs = [t for t in tables if self.is_epoch_table(t)]
+        result = {t: self.load(t, start, end) for t in tables if t not in epochs}
+        if epochs:
+            t_columns = {t: self.columns(t) for t in epochs}
+            all_columns = list(dict.fromkeys(c for cs in t_columns.values() for c in cs))
+            selects = []
+            for t in epochs:
+                fields = ', '.join([self._identifier(c) if c in t_columns[t] else f'NULL AS {self._identifier(c)}'
+                                    for c in all_columns])
+                selects.append(f'SELECT ? AS "__table", time, {fields} FROM {self._identifier(t)} WHERE time >= ? AND time <= ?')
+
+            t0, t1 = pd.Timestamp(start).value, pd.Timestamp(end).value
+            data = pd.read_sql_query(
+                ' UNION ALL '.join(selects) + ' ORDER BY "__table", time', self.db,
+                params=[p for t in epochs for p in (t, t0, t1)]
+            )
+            data['time'] = pd.to_datetime(data['time'], unit='ns')
+            for t, d in data.groupby('__table', sort=False):
+                d = d[['time'] + list(t_columns[t])].set_index('time')
+                # union with NULLs makes integer columns float so restore them
+                for c, ctype in t_columns[t].items():
+                    if ctype == 'INTEGER' and d[c].notna().all():
+                        d[c] = d[c].astype(np.int64)
+                result[t] = d
+            for t in epochs:
+                if t not in result:
+                    result[t] = pd.DataFrame(columns=list(t_columns[t]), index=pd.DatetimeIndex([], name='time'))
+
+        return {t: result[t] for t in tables}
+
+
+    def iterate(self, table, columns, start='2000-01-01', end='2200-01-01', chunksize=100000):
+        """
+        Iterate over rows of table in [start, end] range by chunks of chunksize rows.
+        Every chunk is yielded as (times, values) where times are int64 epoch nanoseconds
+        and values is float64 array (chunksize x len(columns)). Missing columns are filled by nans.
+        """
+        if not self.exists(table) or not self.is_epoch_table(table):
+            raise ValueError(f"Can't find epoch indexed table '{table}' in {self.db_path}")
+
+        t_columns = self.columns(table)
+        fields = ', '.join([self._identifier(c) if c in t_columns else 'NULL' for c in columns])
+        cursor = self.db.execute(
+            f'SELECT time, {fields} FROM {self._identifier(table)} WHERE time >= ? AND time <= ? ORDER BY time',
+            (pd.Timestamp(start).value, pd.Timestamp(end).value)
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                times = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+                values = np.array([r[1:] for r in rows], dtype=np.float64).reshape(len(rows), len(columns))
+                yield times, values
+        finally:
+            cursor.close()
+
+
+def __get_sqlite_storage(vendor, timeframe, path):
+    return SqliteStorage(__get_database_path(vendor, timeframe, path))
+
+
 def update_database(vendor, symbol, data, path='../data/'):
-    timeframe = time_delta_to_str(pd.Timedelta(infer_series_frequency(data[:200])))
+    timeframe = time_delta_to_str(pd.Timedelta(infer_series_frequency(data, n_points=100)))
     tD = pd.Timedelta(timeframe)
-    
+
     # Push data to sqlite3 db
-    with sqlite3.connect(__get_database_path(vendor, timeframe, path)) as db:
-        m_table = symbol
-        table_exists = db.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{m_table}'").fetchone() is not None
-        if table_exists:
-            ranges = pd.read_sql_query(f"SELECT min(time) as Start, max(time) as End FROM {m_table}", db)
-            last_time = ranges.End[0]
-        else:
-            last_time = data.index[0] - tD
-        
-        print(f' >> Inserting {green(symbol)} {yellow(timeframe)} for [{red(last_time)} -> {red(data.index[-1])}] ... ', end='')
-        data_to_insert = data[pd.Timestamp(last_time) + tD:]
-        data_to_insert.to_sql(m_table, db, if_exists='append', index_label='time')
-        db.commit()
+    storage = __get_sqlite_storage(vendor, timeframe, path)
+    last_time = storage.time_range(symbol)[1] if storage.exists(symbol) else None
+    if last_time is None:
+        last_time = SqliteStorage._utc_naive_index(data).index[0] - tD
+
+    print(f' >> Inserting {green(symbol)} {yellow(timeframe)} for [{red(last_time)} -> {red(data.index[-1])}] ... ', end='')
+    if storage.write(symbol, data, pd.Timestamp(last_time) + tD) > 0:
         print(yellow('[OK]'))
+    else:
+        print(yellow('[NOTHING TO APPEND]'))
         
         
 def ls_symbols_hdf(vendor, timeframe='1Min', path='../data'):
@@ -123,16 +554,14 @@ def ls_symbols_hdf(vendor, timeframe='1Min', path='../data'):
             
         
 def ls_symbols(vendor, timeframe='1Min', path='../data'):
-    with sqlite3.connect(__get_database_path(vendor, timeframe, path)) as db:
-        tables = db.execute(f"SELECT name FROM sqlite_master WHERE type='table'").fetchall()
-        for t in tables:
-            ranges = pd.read_sql_query(f"SELECT min(time) as Start, max(time) as End FROM {t[0]}", db)
-            start_time = ranges.Start[0]
-            last_time = ranges.End[0]
-            print(f"{yellow(t[0])}:\t{red(start_time)} - {red(last_time)}")
+    storage = __get_sqlite_storage(vendor, timeframe, path)
+    for t in storage.tables():
+        start_time, last_time = storage.time_range(t)
+        print(f"{yellow(t)}:\t{red(start_time)} - {red(last_time)}")
     
         
-def load_instrument_data(instrument, start='2000-01-01', end='2200-01-01', timeframe='1Min', dbtype='hdf', path='../data'):
+def load_instrument_data(instrument, start='2000-01-01', end='2200-01-01', timeframe='1Min', dbtype='hdf', path='../data',
+                         compact=False):
     if ':' not in instrument:
         raise ValueError("Wrong instrument name format, must be 'exchange:symbol' ")
     
@@ -141,22 +570,207 @@ def load_instrument_data(instrument, start='2000-01-01', end='2200-01-01', timef
     if dbtype == 'hdf':
         data = pd.read_hdf(__get_hdf_database_path(vendor, timeframe, path), symbol)
     else:
-        with sqlite3.connect(__get_database_path(vendor, timeframe, path)) as db:
-            data = pd.read_sql_query(f"SELECT * FROM {symbol.upper()} where time >= '{start}' and time <= '{end}'", db, index_col='time')
-
-        data.index = pd.DatetimeIndex(data.index)
-    return TickData(instrument, symbol, vendor, data)
+        data = __get_sqlite_storage(vendor, timeframe, path).load(symbol.upper(), start, end)
+    td = TickData(instrument, symbol, vendor, data)
+    return td.compact() if compact else td
 
 
-def load_data(*instrument, start='2000-01-01', end='2200-01-01', timeframe='1Min', path='../data', dbtype='hdf'):
+def load_data(*instrument, start='2000-01-01', end='2200-01-01', timeframe='1Min', path='../data', dbtype='hdf',
+              compact=False):
     in_list = instrument if isinstance(instrument, (tuple, list)) else list(instrument)
-    return MultiTickData(*[load_instrument_data(l, start, end, timeframe, dbtype, path) for l in in_list])
+    if dbtype == 'hdf':
+        return MultiTickData(*[load_instrument_data(l, start, end, timeframe, dbtype, path, compact) for l in in_list])
+
+    # for sqlite all symbols from same vendor are loaded by single query
+    for l in in_list:
+        if ':' not in l:
+            raise ValueError("Wrong instrument name format, must be 'exchange:symbol' ")
+    by_vendor = {}
+    for l in in_list:
+        vendor, symbol = l.split(':')
+        by_vendor.setdefault(vendor, []).append(symbol)
+
+    loaded = {}
+    for vendor, symbols in by_vendor.items():
+        data = __get_sqlite_storage(vendor, timeframe, path).load_many([s.upper() for s in symbols], start, end)
+        for s in symbols:
+            td = TickData(f'{vendor}:{s}', s, vendor, data[s.upper()])
+            loaded[f'{vendor}:{s}'] = td.compact() if compact else td
+    return MultiTickData(*[loaded[l] for l in in_list])
         
 
-def import_mt5_ohlc_data(vendor):
-    for fn in glob(f'../data/{vendor}/*.csv.gz'):
-        symbol = split(fn)[-1].split('_')[0].upper()
-        rd = pd.read_csv(fn, sep='\t', parse_dates=[['<DATE>','<TIME>']])
-        rd = rd.rename(columns=lambda x: x.strip('<>').lower()).rename(columns={'date>_<time':'time', 'tickvol':'volume'}).set_index('time')
-        rd = rd.drop(columns='vol')
-        update_database(vendor, symbol, rd)
\ No newline at end of file
+QUOTE_DTYPE = np.dtype([('time', np.int64), ('bid', np.float64), ('ask', np.float64),
+                        ('bid_size', np.float64), ('ask_size', np.float64)])
+
+__QUOTE_COLUMNS = {
+    'bid': ['bid'],
+    'ask': ['ask'],
+    'bid_size': ['bid_size', 'bidvol', 'bid_vol'],
+    'ask_size': ['ask_size', 'askvol', 'ask_vol'],
+}
+
+
+def __quote_columns(columns):
+    """
+    Find stored columns for quote fields (sizes may be absent)
+    """
+    r = []
+    for f, names in __QUOTE_COLUMNS.items():
+        found = [c for c in names if c in columns]
+        if not found and f in ['bid', 'ask']:
+            raise ValueError(f"Can't find '{f}' column in stored data, only quotes can be replayed")
+        r.append(found[0] if found else None)
+    return r
+
+
+def __quote_records(times, values):
+    records = np.empty(len(times), dtype=QUOTE_DTYPE)
+    records['time'] = times
+    for i, f in enumerate(QUOTE_DTYPE.names[1:]):
+        records[f] = values[:, i]
+    return records
+
+
+def replay_ticks(instrument, start='2000-01-01', end='2200-01-01', timeframe='1Min', dbtype='hdf', path='../data',
+                 chunksize=100000, as_records=False):
+    """
+    Streaming quotes reader. Quotes are read from storage by chunks of chunksize rows,
+    so memory consumption doesn't depend on requested interval length.
+
+    >>> for quote_time, bid, ask, bid_size, ask_size in replay_ticks('dukas:EURUSD', '2015-01-01', '2020-01-01'):
+    >>>     ...
+
+    :param instrument: instrument as 'exchange:symbol'
+    :param chunksize: number of rows read at once
+    :param as_records: if True yields chunks as structured arrays (see QUOTE_DTYPE)
+                       otherwise yields every quote as plain tuple (time_ns, bid, ask, bid_size, ask_size)
+    """
+    if ':' not in instrument:
+        raise ValueError("Wrong instrument name format, must be 'exchange:symbol' ")
+
+    vendor, symbol = instrument.split(':')
+    if dbtype == 'hdf':
+        chunks = __replay_hdf_chunks(__get_hdf_database_path(vendor, timeframe, path), symbol, start, end, chunksize)
+    else:
+        storage = __get_sqlite_storage(vendor, timeframe, path)
+        columns = __quote_columns(storage.columns(symbol.upper()))
+        chunks = storage.iterate(symbol.upper(), columns, start, end, chunksize)
+
+    for times, values in chunks:
+        if as_records:
+            yield __quote_records(times, values)
+        else:
+            yield from zip(times.tolist(), *[values[:, i].tolist() for i in range(values.shape[1])])
+
+
+def __replay_hdf_chunks(db_path, symbol, start, end, chunksize):
+    with pd.HDFStore(db_path, 'r') as store:
+        key = f'/{symbol}'
+        columns = __quote_columns(store.select(key, start=0, stop=1).columns)
+        t0, t1 = pd.Timestamp(start), pd.Timestamp(end)
+        for d in store.select(key, where='index >= t0 & index <= t1', chunksize=chunksize):
+            values = np.column_stack([d[c].values if c else np.full(len(d), np.nan) for c in columns])
+            yield d.index.asi8, values.astype(np.float64)
+
+
+def replay_quotes(handler, quotes):
+    """
+    Feed quotes from replay_ticks into handler's on_quote(quote_time, bid, ask, bid_size, ask_size) method
+    (trackers from models/trackers.py for example). Handler may be also plain function with the same signature.
+
+    :return: number of processed quotes
+    """
+    on_quote = handler.on_quote if hasattr(handler, 'on_quote') else handler
+    n = 0
+    for q in quotes:
+        if isinstance(q, np.ndarray):
+            for t, b, a, bs, az in zip(q['time'].astype('datetime64[ns]'), q['bid'].tolist(), q['ask'].tolist(),
+                                       q['bid_size'].tolist(), q['ask_size'].tolist()):
+                on_quote(t, b, a, bs, az)
+            n += len(q)
+        else:
+            t, b, a, bs, az = q
+            on_quote(np.datetime64(t, 'ns'), b, a, bs, az)
+            n += 1
+    return n
+
+
+def _parse_time_of_day(times: np.ndarray) -> np.ndarray:
+    """
+    Vectorized parsing of 'HH:MM:SS' strings into timedelta64 array
+    """
+    b = times.astype('S')
+    if b.dtype.itemsize != 8 or not (np.char.str_len(b) == 8).all():
+        return pd.to_timedelta(times).values
+    v = b.view(np.uint8).reshape(-1, 8).astype(np.int64) - ord('0')
+    secs = (v[:, 0] * 10 + v[:, 1]) * 3600 + (v[:, 3] * 10 + v[:, 4]) * 60 + v[:, 6] * 10 + v[:, 7]
+    return secs * np.timedelta64(1000000000, 'ns')
+
+
+def _parse_mt5_ohlc_file(fn, out_path, chunksize=1000000, min_chunk=100):
+    """
+    Parse MT5 exported OHLC file (<DATE> <TIME> <OPEN> ... tab separated, may be gzipped).
+    File is read by chunks and timestamps are built from explicitly formatted date and time columns.
+    Every parsed chunk is stored into out_path as soon as it's ready so whole file is never kept in memory
+    (chunks smaller than min_chunk rows are joined with previous one so timeframe can be inferred from every chunk).
+
+    :return: (symbol, list of stored chunks files in chronological order)
+    """
+    symbol = split(fn)[-1].split('_')[0].upper()
+    stored, pending = [], None
+
+    def _store(data):
+        f_name = join(out_path, f'{symbol}_{len(stored):05d}.pkl')
+        data.to_pickle(f_name)
+        stored.append(f_name)
+
+    try:
+        reader = pd.read_csv(fn, sep='\t', dtype={'<DATE>': str, '<TIME>': str}, chunksize=chunksize)
+        for rd in reader:
+            if len(rd) == 0:
+                continue
+            times = pd.to_datetime(rd['<DATE>'], format='%Y.%m.%d', cache=True).values
+            if '<TIME>' in rd.columns:
+                times = times + _parse_time_of_day(rd['<TIME>'].values)
+            rd = rd.drop(columns=[c for c in ['<DATE>', '<TIME>', '<VOL>'] if c in rd.columns])
+            rd = rd.rename(columns=lambda x: x.strip('<>').lower()).rename(columns={'tickvol': 'volume'})
+            rd.index = pd.DatetimeIndex(times, name='time')
+
+            if pending is not None and len(rd) >= min_chunk:
+                _store(pending)
+                pending = rd
+            else:
+                pending = rd if pending is None else pd.concat((pending, rd), axis=0)
+    except pd.errors.EmptyDataError:
+        pass
+
+    if pending is not None:
+        _store(pending)
+    return symbol, stored
+
+
+def import_mt5_ohlc_data(vendor, path='../data/', max_workers=None, chunksize=1000000):
+    """
+    Import MT5 exported OHLC files from {path}/{vendor}/*.csv.gz into vendor's sqlite databases.
+
+    Files are decompressed and parsed in parallel by process pool, parsed data is written
+    by this (single) process, so every database has only one writer. Parsed chunks are passed
+    through temporary files and written one by one, so memory usage is bounded by chunksize.
+
+    :param vendor: vendor name
+    :param path: path to data folder
+    :param max_workers: number of parsing processes (default is number of cpus)
+    :param chunksize: number of rows parsed at once
+    """
+    files = glob(join(path, vendor, '*.csv.gz'))
+    tmp_path = tempfile.mkdtemp(prefix=f'mt5_{vendor}_')
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_parse_mt5_ohlc_file, fn, tmp_path, chunksize) for fn in files]
+            for f in as_completed(futures):
+                symbol, chunks = f.result()
+                for c_file in chunks:
+                    update_database(vendor, symbol, pd.read_pickle(c_file), path=path)
+                    os.remove(c_file)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
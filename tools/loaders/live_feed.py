@@ -0,0 +1,271 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, List, Union
+
+import numpy as np
+import pandas as pd
+
+
+class LatencyStats:
+    """
+    Latency statistics for single processing stage (in microseconds)
+    """
+
+    def __init__(self, name, window=10000):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._last = deque(maxlen=window)
+
+    def add(self, seconds):
+        us = seconds * 1e6
+        self.count += 1
+        self.total += us
+        self.max = max(self.max, us)
+        self._last.append(us)
+
+    def report(self) -> dict:
+        last = np.array(self._last) if self._last else np.array([np.nan])
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else np.nan,
+            'p50': np.percentile(last, 50), 'p99': np.percentile(last, 99),
+            'max': self.max,
+        }
+
+    def __repr__(self):
+        r = self.report()
+        return f"{self.name}: n={r['count']} mean={r['mean']:.1f}us p99={r['p99']:.1f}us max={r['max']:.1f}us"
+
+
+class BarsAggregator:
+    """
+    Incremental resampler of quotes into OHLC bars (mid price is used as price).
+    Bars are aligned to timeframe boundaries in UTC (as ohlc_resample does without resample_tz).
+
+    >>> agg = BarsAggregator('1h')
+    >>> closed_bar = agg.update(time_ns, bid, ask)
+    """
+
+    def __init__(self, timeframe, max_bars=1000):
+        self.timeframe = pd.Timedelta(timeframe)
+        self._tf_ns = self.timeframe.value
+        self.bars = deque(maxlen=max_bars)
+        self._start = None
+        self._o = self._h = self._l = self._c = np.nan
+        self._v = 0.0
+
+    def update(self, time_ns: int, bid: float, ask: float, volume: float = 0.0) -> Union[tuple, None]:
+        """
+        Update current bar by new quote
+
+        :return: just closed bar as (time_ns, open, high, low, close, volume) or None if bar is not closed yet
+        """
+        price = (bid + ask) / 2
+        start = time_ns - time_ns % self._tf_ns
+        closed = None
+        if start != self._start:
+            if self._start is not None:
+                closed = (self._start, self._o, self._h, self._l, self._c, self._v)
+                self.bars.append(closed)
+            self._start = start
+            self._o = self._h = self._l = self._c = price
+            self._v = 0.0
+        else:
+            if price > self._h:
+                self._h = price
+            if price < self._l:
+                self._l = price
+            self._c = price
+        if volume == volume:
+            self._v += volume
+        return closed
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Closed bars as DataFrame
+        """
+        b = np.array(self.bars, dtype=np.float64).reshape(-1, 6)
+        return pd.DataFrame(b[:, 1:], columns=['open', 'high', 'low', 'close', 'volume'],
+                            index=pd.DatetimeIndex(b[:, 0].astype(np.int64), name='time'))
+
+
+class FileQuotesSource:
+    """
+    Quotes source from stored data (iterator of (time_ns, bid, ask, bid_size, ask_size) tuples, see replay_ticks)
+    or csv file with time,bid,ask[,bid_size,ask_size] columns. If speed is set quotes are paced in
+    time (speed=1 - real time, 10 - ten times faster).
+    """
+
+    def __init__(self, quotes, speed=None, chunksize=100000):
+        self.quotes = quotes
+        self.speed = speed
+        self.chunksize = chunksize
+
+    def _iterate(self):
+        if not isinstance(self.quotes, str):
+            yield from self.quotes
+            return
+
+        for d in pd.read_csv(self.quotes, parse_dates=['time'], chunksize=self.chunksize):
+            bs = d['bid_size'].values if 'bid_size' in d.columns else np.full(len(d), np.nan)
+            az = d['ask_size'].values if 'ask_size' in d.columns else np.full(len(d), np.nan)
+            yield from zip(pd.DatetimeIndex(d['time']).asi8.tolist(), d['bid'].tolist(), d['ask'].tolist(),
+                           bs.tolist(), az.tolist())
+
+    async def __aiter__(self):
+        t0_wall, t0_feed = None, None
+        for n, q in enumerate(self._iterate()):
+            if self.speed:
+                if t0_feed is None:
+                    t0_wall, t0_feed = time.monotonic(), q[0]
+                delay = (q[0] - t0_feed) / 1e9 / self.speed - (time.monotonic() - t0_wall)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif n % 1000 == 0:
+                # let other feeds work
+                await asyncio.sleep(0)
+            yield q
+
+
+class SocketQuotesSource:
+    """
+    Quotes source reading lines 'time_ns,bid,ask,bid_size,ask_size' from tcp socket (broker's stand-in)
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                f = line.decode().strip().split(',')
+                if len(f) < 3:
+                    continue
+                yield (int(f[0]), float(f[1]), float(f[2]),
+                       float(f[3]) if len(f) > 3 else np.nan, float(f[4]) if len(f) > 4 else np.nan)
+        finally:
+            writer.close()
+
+
+def model_signals(model) -> Callable:
+    """
+    Wraps signals generator (for example Lustre) so it's called on closed bars and returns
+    signal generated for the last closed bar (or None)
+    """
+
+    def _signal(bars: pd.DataFrame):
+        s = model.predict(bars)
+        if s is None or len(s) == 0:
+            return None
+        s = s.iloc[:, 0] if isinstance(s, pd.DataFrame) else s
+        s = s[s.index >= bars.index[-1]].dropna()
+        return s.iloc[-1] if len(s) > 0 else None
+
+    return _signal
+
+
+class SymbolFeed:
+    """
+    Live processing pipeline for single symbol:
+
+        source -> bounded queue -> quotes dispatcher -> bars aggregator -> signal logic -> handlers
+
+    Quotes are passed to handlers' on_quote(quote_time, bid, ask, bid_size, ask_size). On every closed bar
+    signal function is called with DataFrame of closed bars and non-empty signal is dispatched
+    to handlers' on_signal(signal_time, signal_qty, quote_time, bid, ask, bid_size, ask_size).
+    As in signals tester, not None value returned from on_signal is handler's target position and
+    it's executed by handler's trade(quote_time, position).
+    Bounded queue provides backpressure: source waits when processing is behind.
+
+    Handlers' lifecycle is not managed here: handlers must be initialized before feed is started
+    (for trackers it means initialize() is called and get_ohlc_series() is provided by the caller's environment).
+    """
+
+    def __init__(self, symbol, source, timeframe, signal: Callable = None, handlers: List = None,
+                 max_queue=10000, max_bars=1000):
+        self.symbol = symbol
+        self.source = source
+        self.signal = signal
+        self.handlers = handlers if handlers is not None else []
+        self.aggregator = BarsAggregator(timeframe, max_bars)
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.signals = []
+        self.metrics = {
+            s: LatencyStats(s) for s in ['queue', 'quote', 'signal']
+        }
+
+    async def _produce(self):
+        async for q in self.source:
+            await self.queue.put((time.perf_counter(), q))
+        await self.queue.put(None)
+
+    async def _consume(self):
+        m_queue, m_quote, m_signal = self.metrics['queue'], self.metrics['quote'], self.metrics['signal']
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                break
+            t_put, (t, bid, ask, bid_size, ask_size) = item
+            t0 = time.perf_counter()
+            m_queue.add(t0 - t_put)
+
+            q_time = np.datetime64(t, 'ns')
+            closed = self.aggregator.update(t, bid, ask)
+            for h in self.handlers:
+                h.on_quote(q_time, bid, ask, bid_size, ask_size)
+            t1 = time.perf_counter()
+            m_quote.add(t1 - t0)
+
+            if closed is not None and self.signal is not None:
+                s = self.signal(self.aggregator.frame())
+                if s is not None:
+                    self.signals.append((q_time, s))
+                    for h in self.handlers:
+                        if hasattr(h, 'on_signal'):
+                            pos = h.on_signal(q_time, s, q_time, bid, ask, bid_size, ask_size)
+                            if pos is not None and hasattr(h, 'trade'):
+                                h.trade(q_time, pos)
+                m_signal.add(time.perf_counter() - t1)
+
+    async def run(self):
+        await asyncio.gather(self._produce(), self._consume())
+        return self
+
+
+class LiveFeed:
+    """
+    Runs multiple symbols feeds concurrently in one event loop
+
+    >>> feed = LiveFeed(
+    >>>     SymbolFeed('EURUSD', FileQuotesSource(replay_ticks('dukas:EURUSD', '2020-01-01')), '1h',
+    >>>                model_signals(Lustre('1h', 14, 0.75, 50, 10)), [tracker]),
+    >>>     ...)
+    >>> feed.run()
+    >>> feed.metrics()
+    """
+
+    def __init__(self, *feeds: SymbolFeed):
+        self.feeds = {f.symbol: f for f in feeds}
+
+    async def arun(self):
+        await asyncio.gather(*[f.run() for f in self.feeds.values()])
+        return self
+
+    def run(self):
+        return asyncio.run(self.arun())
+
+    def metrics(self) -> pd.DataFrame:
+        """
+        Latency metrics (microseconds) for all symbols and stages
+        """
+        return pd.DataFrame({
+            (s, n): m.report() for s, f in self.feeds.items() for n, m in f.metrics.items()
+        }).T
@@ -1,7 +1,6 @@
 import os
 import traceback
 import pandas as pd
-from collections import OrderedDict, namedtuple
 from datetime import timedelta as timedelta_t
 from typing import Union, List, Set, Dict
 
@@ -55,7 +54,8 @@ def time_delta_to_str(d: Union[int, timedelta_t, pd.Timedelta]):
 
 class mstruct:
     """
-    Dynamic structure (similar to matlab's struct it allows to add new properties dynamically)
+    Dynamic structure (similar to matlab's struct it allows to add new properties dynamically).
+    Fields are kept in instance's dict so setting attribute is O(1).
 
     >>> a = mstruct(x=1, y=2)
     >>> a.z = 'Hello'
@@ -70,40 +70,27 @@ class mstruct:
     """
 
     def __init__(self, **kwargs):
-        _odw = OrderedDict(**kwargs)
-        self.__initialize(_odw.keys(), _odw.values())
+        self.__dict__.update(kwargs)
 
-    def __initialize(self, fields, values):
-        self._fields = list(fields)
-        self._meta = namedtuple('mstruct', ' '.join(fields))
-        self._inst = self._meta(*values)
-
-    def __getattr__(self, k):
-        return getattr(self._inst, k)
+    @property
+    def _fields(self):
+        return list(self.__dict__.keys())
 
     def __dir__(self):
         return self._fields
 
     def __repr__(self):
-        return self._inst.__repr__()
-
-    def __setattr__(self, k, v):
-        if k not in ['_inst', '_meta', '_fields']:
-            new_vals = {**self._inst._asdict(), **{k: v}}
-            self.__initialize(new_vals.keys(), new_vals.values())
-        else:
-            super().__setattr__(k, v)
+        return 'mstruct(%s)' % ', '.join('%s=%r' % (k, v) for k, v in self.__dict__.items())
 
     def __getstate__(self):
-        return self._inst._asdict()
+        return dict(self.__dict__)
 
     def __setstate__(self, state):
-        self.__init__(**state)
+        self.__dict__.update(state)
 
     def __ms2d(self, m):
         r = {}
-        for f in m._fields:
-            v = m.__getattr__(f)
+        for f, v in m.__dict__.items():
             r[f] = self.__ms2d(v) if isinstance(v, mstruct) else v
         return r
     
@@ -132,5 +119,5 @@ def dict2struct(d: dict):
     for k, v in d.items():
         if isinstance(v, dict):
             v = dict2struct(v)
-        m.__setattr__(k, v)
+        setattr(m, k, v)
     return m